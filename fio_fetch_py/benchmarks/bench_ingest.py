@@ -0,0 +1,98 @@
+"""
+Benchmark: saving fetched transactions.
+
+Runs fetch_and_save_transactions on generated transactions, the path every
+fetch takes: the statement is saved in INSERT_CHUNK_SIZE batches, each one
+inserted with INSERT ... ON CONFLICT DO NOTHING, matched, added to the rollup
+and committed on the writer thread. With --legacy, also times the previous
+per-row path (SELECT by transaction_id + session.add) on the same rows.
+
+Usage (from fio_fetch_py):
+    python benchmarks/bench_ingest.py [--rows 200000] [--legacy]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fiofetch.database import get_engine, init_db, get_session_local
+from fiofetch.fio import fetch_and_save_transactions, transaction_row, ParsedStatement
+from fiofetch.models import Transaction
+
+
+def generate(count: int):
+    start = date(2024, 1, 1)
+    return [
+        {
+            'transaction_id': str(20_000_000_000 + i),
+            'date': start + timedelta(days=i * 365 // count),
+            'amount': round((i % 5000) * 1.37 - 2000, 2),
+            'currency': 'CZK',
+            'counter_account': f'{100000 + i % 997}',
+            'counter_account_name': f'Payer {i % 997}',
+            'bank_code': '2010',
+            'variable_symbol': str(25000 + i % 300),
+            'specific_symbol': str(i % 40),
+            'message_for_recipient': f'Platba za objednávku {i}',
+            'type': 'Bezhotovostní příjem',
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_save(session, transactions):
+    """The per-row path fetch_and_save_transactions used before."""
+    saved = 0
+    for tr_data in transactions:
+        if session.query(Transaction).filter_by(transaction_id=str(tr_data['transaction_id'])).first():
+            continue
+        session.add(Transaction(**transaction_row(tr_data)))
+        saved += 1
+    session.commit()
+    return saved
+
+
+def timed_run(func):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(os.path.join(tmp, 'bench.db'))
+        init_db(engine)
+        SessionLocal = get_session_local(engine)
+        session = SessionLocal()
+        try:
+            started = time.perf_counter()
+            saved = func(session)
+            return saved, time.perf_counter() - started
+        finally:
+            SessionLocal.remove()
+            engine.dispose()
+
+
+def streamed(transactions):
+    def run(session):
+        with patch('fiofetch.fio.fetch_statement', new=lambda *args: ParsedStatement(transactions)):
+            return asyncio.run(fetch_and_save_transactions('token', session, api_url='http://bench'))
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--legacy', action='store_true', help='Also time the per-row path')
+    args = parser.parse_args()
+
+    transactions = generate(args.rows)
+    saved, elapsed = timed_run(streamed(transactions))
+    print(f"batched save:  {saved:7d} rows in {elapsed:7.2f} s ({saved / elapsed:8.0f} rows/s)")
+    if args.legacy:
+        saved, elapsed = timed_run(lambda session: legacy_save(session, transactions))
+        print(f"per-row (old): {saved:7d} rows in {elapsed:7.2f} s ({saved / elapsed:8.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: API middleware overhead and response compression.
+
+Serves a prebuilt 1000-row /transactions-like JSON body through
+  - the previous BaseHTTPMiddleware NoCacheMiddleware,
+  - the pure ASGI NoCacheMiddleware,
+  - the pure ASGI NoCacheMiddleware + CompressionMiddleware (gzip, or brotli
+    when installed),
+and reports requests per second and bytes sent per response.
+
+Usage (from fio_fetch_py):
+    python benchmarks/bench_middleware.py [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from fiofetch.middleware import NoCacheMiddleware, CompressionMiddleware, brotli
+
+
+class LegacyNoCacheMiddleware(BaseHTTPMiddleware):
+    """The NoCacheMiddleware previously defined in fiofetch/main.py."""
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.url.path.startswith("/api/"):
+            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+            response.headers["Pragma"] = "no-cache"
+            response.headers["Expires"] = "0"
+        return response
+
+
+def page_body(rows: int = 1000) -> bytes:
+    return json.dumps([
+        {
+            'id': i, 'transaction_id': str(10_000_000 + i), 'date': '2025-01-15', 'amount': 1234.5,
+            'currency': 'CZK', 'counter_account': str(100000 + i % 997), 'counter_account_name': f'Payer {i % 997}',
+            'bank_code': '2010', 'bank_name': 'Fio banka, a.s.', 'constant_symbol': None,
+            'variable_symbol': str(25000 + i % 300), 'specific_symbol': str(i % 40), 'user_identification': None,
+            'message_for_recipient': f'Platba za objednávku {i}', 'type': 'Bezhotovostní příjem', 'executor': None,
+            'specification': None, 'comment': None, 'bic': None, 'instruction_id': None, 'payer_reference': None,
+        }
+        for i in range(rows)
+    ], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def make_app(*middleware) -> FastAPI:
+    app = FastAPI()
+    body = page_body()
+
+    @app.get("/api/v1/transactions")
+    def transactions():
+        return Response(body, media_type="application/json")
+
+    for cls, kwargs in middleware:
+        app.add_middleware(cls, **kwargs)
+    return app
+
+
+async def run(app: FastAPI, requests: int, accept_encoding: str):
+    transport = httpx.ASGITransport(app=app)
+    sent = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/api/v1/transactions", headers={"Accept-Encoding": accept_encoding})
+            sent = len(response.read()) if 'content-encoding' not in response.headers else int(response.headers['content-length'])
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    encoding = 'br' if brotli is not None else 'gzip'
+    cases = [
+        ("BaseHTTPMiddleware no-cache", make_app((LegacyNoCacheMiddleware, {})), 'identity'),
+        ("ASGI no-cache", make_app((NoCacheMiddleware, {})), 'identity'),
+        (f"ASGI no-cache + {encoding}", make_app((NoCacheMiddleware, {}), (CompressionMiddleware, {})), encoding),
+    ]
+    print(f"{args.requests} requests, in-process ASGI transport:")
+    for name, app, accept_encoding in cases:
+        rate, sent = asyncio.run(run(app, args.requests, accept_encoding))
+        print(f"  {name:<32} {rate:8.0f} req/s  {sent:8d} bytes/response")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: peak memory of fetching and saving a large Fio statement.
+
+Generates a statement with --rows transactions in the tr.json format, serves
+it from a local HTTP server and saves it into a fresh database
+  - at once (download, json.loads + parse_statement, then save the list;
+    the previous fetch path),
+  - through fetch_and_save_transactions, which parses the response as it
+    arrives and hands it to the database writer in batches.
+Peak Python heap usage (all threads) is measured with tracemalloc; the raw
+document the server sends is allocated before measuring.
+
+Usage (from fio_fetch_py):
+    python benchmarks/bench_statement_parse.py [--rows 50000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fiofetch.database import get_engine, init_db, get_session_local
+from fiofetch.fio import commit_transactions, fetch_and_save_transactions, parse_statement
+from fiofetch.writer import db_writer
+
+
+def column(number, name, value):
+    return {'value': value, 'name': name, 'id': number}
+
+
+def generate(rows: int) -> bytes:
+    transactions = [
+        {
+            'column22': column(22, 'ID pohybu', 20_000_000_000 + i),
+            'column0': column(0, 'Datum', '2025-01-15+0100'),
+            'column1': column(1, 'Objem', round((i % 5000) * 1.37 - 2000, 2)),
+            'column14': column(14, 'Měna', 'CZK'),
+            'column2': column(2, 'Protiúčet', f'{100000 + i % 997}'),
+            'column10': column(10, 'Název protiúčtu', f'Payer {i % 997}'),
+            'column3': column(3, 'Kód banky', '2010'),
+            'column5': column(5, 'VS', str(25000 + i % 300)),
+            'column16': column(16, 'Zpráva pro příjemce', f'Platba za objednávku {i}'),
+            'column8': column(8, 'Typ', 'Bezhotovostní příjem'),
+        }
+        for i in range(rows)
+    ]
+    statement = {'accountStatement': {'info': {'accountId': '2400222222', 'idTo': 20_000_000_000 + rows - 1},
+                                      'transactionList': {'transaction': transactions}}}
+    return json.dumps(statement, ensure_ascii=False).encode('utf-8')
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak, elapsed
+
+
+async def serve(raw: bytes, save):
+    """Serve raw as every Fio statement while save(api_url, session) runs."""
+    async def statement(request):
+        response = web.StreamResponse(headers={'Content-Type': 'application/json'})
+        await response.prepare(request)
+        for start in range(0, len(raw), 64 * 1024):
+            await response.write(raw[start:start + 64 * 1024])
+        return response
+
+    app = web.Application()
+    app.router.add_get('/v1/rest/periods/{token}/{start}/{end}/transactions.json', statement)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(os.path.join(tmp, 'bench.db'))
+        init_db(engine)
+        SessionLocal = get_session_local(engine)
+        try:
+            async with TestServer(app) as server:
+                return await save(str(server.make_url('/v1/rest')), SessionLocal())
+        finally:
+            SessionLocal.remove()
+            engine.dispose()
+
+
+async def full_parse(api_url: str, session) -> int:
+    async with aiohttp.ClientSession() as client:
+        async with client.get(f"{api_url}/periods/token/2025-01-01/2025-01-31/transactions.json") as response:
+            raw = await response.read()
+    _, transactions = parse_statement(json.loads(raw))
+    inserted, _ = await db_writer.run(commit_transactions, session, transactions)
+    return inserted
+
+
+async def streaming_save(api_url: str, session) -> int:
+    return await fetch_and_save_transactions('token', session, api_url=api_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    raw = generate(args.rows)
+    print(f"statement of {args.rows} transactions, {len(raw) / 1e6:.1f} MB:")
+    for name, save in (("json.loads + list", full_parse), ("streamed fetch", streaming_save)):
+        count, peak, elapsed = measure(lambda: asyncio.run(serve(raw, save)))
+        print(f"  {name:<18} {count:7d} rows  peak {peak / 1e6:8.1f} MB  {elapsed:6.2f} s")
+
+
+if __name__ == '__main__':
+    main()
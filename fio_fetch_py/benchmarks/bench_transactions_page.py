@@ -0,0 +1,96 @@
+"""
+Benchmark: serializing a /transactions page.
+
+Compares the ORM path (load Transaction objects, validate each through
+TransactionOut, render with JSONResponse) with the row tuple path used by
+list_transactions (Core SELECT of the exported columns + export.json_rows()).
+
+Usage (from fio_fetch_py):
+    python benchmarks/bench_transactions_page.py [--rows 20000] [--limit 1000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.responses import JSONResponse
+from fiofetch.api import TransactionOut
+from fiofetch.database import get_engine, init_db, get_session_local
+from fiofetch.export import export_select, json_rows, orjson
+from fiofetch.models import Transaction
+
+
+def populate(session, count: int):
+    start = date(2024, 1, 1)
+    session.execute(Transaction.__table__.insert(), [
+        {
+            'transaction_id': str(10_000_000 + i),
+            'date': start + timedelta(days=i % 365),
+            'amount': round((i % 5000) * 1.37 - 2000, 2),
+            'currency': 'CZK',
+            'counter_account': f'{100000 + i % 997}',
+            'counter_account_name': f'Payer {i % 997}',
+            'bank_code': '2010',
+            'bank_name': 'Fio banka, a.s.',
+            'variable_symbol': str(25000 + i % 300),
+            'specific_symbol': str(i % 40),
+            'message_for_recipient': f'Platba za objednávku {i}',
+            'type': 'Bezhotovostní příjem',
+        }
+        for i in range(count)
+    ])
+    session.commit()
+
+
+def orm_page(session, limit: int) -> bytes:
+    query = session.query(Transaction).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit)
+    items = [TransactionOut.model_validate(t).model_dump(mode='json') for t in query.all()]
+    return JSONResponse(items).body
+
+
+def row_page(session, limit: int) -> bytes:
+    return json_rows(session.execute(export_select().limit(limit)).all())
+
+
+def timed(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(os.path.join(tmp, 'bench.db'))
+        init_db(engine)
+        session = get_session_local(engine)()
+        populate(session, args.rows)
+
+        import json
+        assert json.loads(orm_page(session, args.limit)) == json.loads(row_page(session, args.limit))
+
+        orm = timed(lambda: orm_page(session, args.limit), args.repeat)
+        rows = timed(lambda: row_page(session, args.limit), args.repeat)
+        session.close()
+        engine.dispose()
+
+    encoder = 'orjson' if orjson is not None else 'json'
+    print(f"page of {args.limit} rows (best of {args.repeat}):")
+    print(f"  ORM + TransactionOut: {orm * 1000:8.2f} ms")
+    print(f"  row tuples + {encoder:<7}: {rows * 1000:8.2f} ms  ({orm / rows:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
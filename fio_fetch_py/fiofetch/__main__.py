@@ -1,8 +1,66 @@
 import uvicorn
 import logging
+import sys
 from .config import get_config
 
+def export_parquet_command():
+    """Run `fiofetch export-parquet`: write the Parquet export and exit."""
+    from .database import get_engine, init_db
+    from .parquet import export_parquet
+    
+    logging.basicConfig(level=logging.INFO)
+    config = get_config()
+    engine = get_engine(config.db_path)
+    init_db(engine)
+    summary = export_parquet(engine, config.export_dir)
+    print(f"Wrote {summary['transactions_written']} new transaction(s) and "
+          f"{summary['matching_data_rows']} matching data row(s) to {summary['export_dir']}")
+
+def backfill_command():
+    """Run `fiofetch backfill --from YYYY-MM-DD [--to YYYY-MM-DD] [--chunk-days N]`."""
+    import argparse
+    import asyncio
+    from datetime import date
+    from .backfill import backfill, DEFAULT_CHUNK_DAYS
+    from .database import get_engine, init_db, get_session_local
+    
+    parser = argparse.ArgumentParser(prog="fiofetch backfill", description="Download transaction history in chunks")
+    parser.add_argument("--from", dest="date_from", required=True, type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default=date.today(), type=date.fromisoformat, help="Last day (default: today)")
+    parser.add_argument("--chunk-days", default=DEFAULT_CHUNK_DAYS, type=int, help="Days per Fio API request")
+    args, remaining = parser.parse_known_args(sys.argv[1:])
+    # The remaining options are the usual server config (token, db path, ...)
+    sys.argv[1:] = remaining
+    
+    logging.basicConfig(level=logging.INFO)
+    config = get_config()
+    if not config.fio_token:
+        sys.exit("A Fio token is required for backfill (--fio-token or FIO_FETCH_TOKEN)")
+    engine = get_engine(config.db_path)
+    init_db(engine)
+    SessionLocal = get_session_local(engine)
+    try:
+        summary = asyncio.run(backfill(
+            config.fio_token, config.fio_api_url, SessionLocal(),
+            args.date_from, args.date_to, chunk_days=args.chunk_days
+        ))
+    finally:
+        SessionLocal.remove()
+        engine.dispose()
+    print(f"Backfilled {summary['chunks']} chunk(s): {summary['inserted']} new transaction(s), "
+          f"{summary['skipped']} already stored")
+
+COMMANDS = {
+    "export-parquet": export_parquet_command,
+    "backfill": backfill_command,
+}
+
 def main():
+    # Subcommands are taken off argv so the remaining options parse as usual
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        command = COMMANDS[sys.argv.pop(1)]
+        return command()
+    
     config = get_config()
     
     # Configure uvicorn to use DEBUG level for all loggers
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import date, datetime, timedelta
 from .database import get_session_local
-from .models import Transaction, MatchingData
+from .models import Transaction, MatchingData, TransactionMatch
+from .matching import rematch_all, symbol_norms
+from .cache import bump_data_version, data_etag, read_data_version, match_cache
+from .reconcile import reconcile, entry_totals_select, STATES
+from .textmatch import find_candidates
+from .filters import TransactionFilters
+from .search import fts_available
+from .export import EXPORT_COLUMNS, EXPORT_FORMATS, export_select, export_chunks, json_rows
+from .parquet import export_parquet
+from .rollup import aggregate, rebuild_rollup, GROUP_BY, METRICS
 from .config import get_config
-from .utils import mask_token
+from .utils import mask_token, encode_cursor, decode_cursor
 import os
 import asyncio
 import logging
@@ -73,188 +84,246 @@ class ConfigUpdate(BaseModel):
     fio_api_url: Optional[str] = None
     back_date_days: Optional[int] = None
 
+def get_match_workers() -> int:
+    """Number of worker processes used for bulk matching (from config)."""
+    return get_config().match_workers
+
+def get_export_dir() -> str:
+    """Directory for Parquet exports (from config)."""
+    return get_config().export_dir
+
 def get_matched_transaction_ids(db: Session, debug: bool = False) -> set:
-    """Get IDs of transactions that match the matching data."""
-    def normalize_symbol(value):
-        """Normalize symbol value - treat null, empty, '-', 'null', 'N/A' as empty."""
-        if value is None:
-            return ''
-        s = str(value).strip()
-        if s == '' or s == '-' or s.lower() in ('null', 'undefined', 'n/a'):
-            return ''
-        return s
-    
-    matched_ids = set()
-    matching_entries = db.query(MatchingData).all()
-    
-    if not matching_entries:
-        if debug:
-            logger.debug("No matching entries found")
-        return matched_ids
-    
-    transactions = db.query(Transaction).all()
-    
-    if debug:
-        logger.debug(f"Checking {len(matching_entries)} matching entries against {len(transactions)} transactions")
+    """
+    Get IDs of transactions that match the matching data.
     
-    for entry in matching_entries:
-        entry_vs = normalize_symbol(entry.variable_symbol)
-        entry_ss = normalize_symbol(entry.specific_symbol)
-        
-        # Skip entries that don't have both VS and SS
-        if not entry_vs or not entry_ss:
-            if debug:
-                logger.debug(f"Skipping entry (missing VS or SS): VS='{entry.variable_symbol}' SS='{entry.specific_symbol}'")
-            continue
-        
-        for tx in transactions:
-            tx_vs = normalize_symbol(tx.variable_symbol)
-            tx_ss = normalize_symbol(tx.specific_symbol)
-            
-            # Transaction must have both VS and SS
-            if not tx_vs or not tx_ss:
-                continue
-            
-            # VS and SS must both match exactly
-            if entry_vs != tx_vs or entry_ss != tx_ss:
-                continue
-            
-            # KS is optional
-            entry_ks = normalize_symbol(entry.constant_symbol)
-            if entry_ks:
-                tx_ks = normalize_symbol(tx.constant_symbol)
-                if not tx_ks or entry_ks != tx_ks:
-                    continue
-            
-            if debug:
-                logger.debug(f"MATCH: tx.id={tx.id} VS={tx_vs} SS={tx_ss} matched entry VS={entry_vs} SS={entry_ss}")
-            matched_ids.add(tx.id)
+    Reads the maintained transaction_match table.
+    """
+    matched_ids = set(db.scalars(select(TransactionMatch.tx_id).distinct()))
     
     if debug:
-        logger.debug(f"Total matched transaction IDs: {matched_ids}")
+        logger.debug(f"Total matched transaction IDs: {len(matched_ids)}")
     
     return matched_ids
 
-@router.get("/transactions", response_model=List[TransactionOut])
+def cached_match_result(db: Session, request: Request, response: Response, compute):
+    """
+    Return a match-dependent result from the generation cache.
+    
+    The cache key is the database, endpoint and query parameters; entries are
+    valid for one data version. The response reports whether the value was
+    served from the cache in X-Match-Cache.
+    """
+    key = (
+        str(db.get_bind().url),
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+    )
+    value, hit = match_cache.get_or_compute(key, read_data_version(db), compute)
+    response.headers["X-Match-Cache"] = "hit" if hit else "miss"
+    return value
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def check_etag(request: Request, response: Response, db: Session = Depends(get_db)) -> str:
+    """
+    Conditional GET for endpoints whose result only changes with the data.
+    
+    The ETag is derived from the data version (bumped in every write, by any
+    process), the path and the query parameters. The date is included because
+    overdue states depend on it. A matching If-None-Match is answered with 304
+    after reading the version row only, before the endpoint's own queries.
+    """
+    etag = data_etag(
+        read_data_version(db),
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        date.today().isoformat(),
+    )
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return etag
+
+@router.get("/transactions", response_model=List[TransactionOut], dependencies=[Depends(check_etag)])
 def list_transactions(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
-    variable_symbol: Optional[str] = Query(None, description="Filter by Variable Symbol (substring match)"),
-    specific_symbol: Optional[str] = Query(None, description="Filter by Specific Symbol (substring match)"),
-    constant_symbol: Optional[str] = Query(None, description="Filter by Constant Symbol (substring match)"),
-    counter_account: Optional[str] = Query(None, description="Filter by Counter Account (substring match)"),
-    counter_account_name: Optional[str] = Query(None, description="Filter by Counter Account Name (substring match)"),
-    bank_code: Optional[str] = Query(None, description="Filter by Bank Code (substring match)"),
-    bank_name: Optional[str] = Query(None, description="Filter by Bank Name (substring match)"),
-    executor: Optional[str] = Query(None, description="Filter by Executor (substring match)"),
-    transaction_id: Optional[str] = Query(None, description="Filter by Transaction ID (substring match)"),
-    hide_matched: bool = Query(False, description="Hide transactions that match the matching data"),
+    after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; returns the page after it (skip is ignored)"),
+    with_total: bool = Query(False, description="Also return the total filtered count in the X-Total-Count header"),
+    filters: TransactionFilters = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     List transactions with advanced filtering and pagination.
     All filter parameters support substring matching (case-insensitive).
-    """
-    query = db.query(Transaction)
-    
-    # Filter out matched transactions if requested
-    if hide_matched:
-        matched_ids = get_matched_transaction_ids(db, debug=True)
-        logger.info(f"[list_transactions] hide_matched=True, filtering out {len(matched_ids)} IDs: {matched_ids}")
-        if matched_ids:
-            query = query.filter(~Transaction.id.in_(matched_ids))
-    
-    # Apply filters with substring matching (case-insensitive)
-    if variable_symbol:
-        query = query.filter(Transaction.variable_symbol.ilike(f"%{variable_symbol}%"))
     
-    if specific_symbol:
-        query = query.filter(Transaction.specific_symbol.ilike(f"%{specific_symbol}%"))
+    Pages can be requested with skip/limit or with the keyset cursor from
+    the X-Next-Cursor header of the previous page (after=...). Cursor pages
+    stay stable while new transactions are being inserted.
     
-    if constant_symbol:
-        query = query.filter(Transaction.constant_symbol.ilike(f"%{constant_symbol}%"))
+    With with_total=true the total count is computed in the same query
+    (COUNT(*) OVER ()) and returned in X-Total-Count, so a separate
+    /transactions/count call is not needed.
     
-    if counter_account:
-        query = query.filter(Transaction.counter_account.ilike(f"%{counter_account}%"))
-    
-    if counter_account_name:
-        query = query.filter(Transaction.counter_account_name.ilike(f"%{counter_account_name}%"))
-    
-    if bank_code:
-        query = query.filter(Transaction.bank_code.ilike(f"%{bank_code}%"))
-    
-    if bank_name:
-        query = query.filter(Transaction.bank_name.ilike(f"%{bank_name}%"))
-    
-    if executor:
-        query = query.filter(Transaction.executor.ilike(f"%{executor}%"))
+    The page is selected as plain row tuples and encoded straight to JSON
+    (see export.json_rows()); the body has the TransactionOut schema.
+    """
+    fts = fts_available(db)
+    stmt = filters.apply(export_select(), fts=fts)
     
-    if transaction_id:
-        query = query.filter(Transaction.transaction_id.ilike(f"%{transaction_id}%"))
+    if after:
+        try:
+            after_date, after_id = decode_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stmt = stmt.where(tuple_(Transaction.date, Transaction.id) < tuple_(after_date, after_id))
+        skip = 0
     
     # Apply pagination
-    transactions = query.order_by(Transaction.date.desc(), Transaction.id.desc()).offset(skip).limit(limit).all()
-    
-    return transactions
+    stmt = stmt.offset(skip).limit(limit)
+    
+    def load_page(page_stmt):
+        total = None
+        if with_total and not after:
+            rows = db.execute(page_stmt.add_columns(func.count().over())).all()
+            if rows:
+                total = rows[0][-1]
+            elif skip == 0:
+                total = 0
+            rows = [row[:-1] for row in rows]
+        else:
+            rows = db.execute(page_stmt).all()
+        if with_total and total is None:
+            # Cursor pages and pages past the end need a separate count
+            total = db.scalar(filters.apply(select(func.count(Transaction.id)), fts=fts))
+        next_cursor = None
+        if len(rows) == limit:
+            last = dict(zip((column.key for column in page_stmt.selected_columns), rows[-1]))
+            next_cursor = encode_cursor(last['date'], last['id'])
+        return rows, total, next_cursor
+    
+    def load_page_ids():
+        rows, total, next_cursor = load_page(stmt.with_only_columns(Transaction.id, Transaction.date))
+        return tuple(row[0] for row in rows), total, next_cursor
+    
+    if filters.hide_matched:
+        # Only the match-dependent part is cached (which ids are on the page),
+        # the rows are loaded by primary key. Encoded pages of up to 1000 rows
+        # for every filter typed would take a lot of memory.
+        ids, total, next_cursor = cached_match_result(db, request, response, load_page_ids)
+        rows = db.execute(export_select().where(Transaction.id.in_(ids))).all()
+    else:
+        rows, total, next_cursor = load_page(stmt)
+    body = json_rows(rows)
+    
+    # Returned directly, so headers set on the injected response don't apply
+    page = Response(content=body, media_type="application/json")
+    for header in ("ETag", "X-Match-Cache"):
+        if header in response.headers:
+            page.headers[header] = response.headers[header]
+    if total is not None:
+        page.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        page.headers["X-Next-Cursor"] = next_cursor
+    
+    return page
 
-@router.get("/transactions/count")
+@router.get("/transactions/count", dependencies=[Depends(check_etag)])
 def get_transactions_count(
-    variable_symbol: Optional[str] = Query(None, description="Filter by Variable Symbol (substring match)"),
-    specific_symbol: Optional[str] = Query(None, description="Filter by Specific Symbol (substring match)"),
-    constant_symbol: Optional[str] = Query(None, description="Filter by Constant Symbol (substring match)"),
-    counter_account: Optional[str] = Query(None, description="Filter by Counter Account (substring match)"),
-    counter_account_name: Optional[str] = Query(None, description="Filter by Counter Account Name (substring match)"),
-    bank_code: Optional[str] = Query(None, description="Filter by Bank Code (substring match)"),
-    bank_name: Optional[str] = Query(None, description="Filter by Bank Name (substring match)"),
-    executor: Optional[str] = Query(None, description="Filter by Executor (substring match)"),
-    transaction_id: Optional[str] = Query(None, description="Filter by Transaction ID (substring match)"),
-    hide_matched: bool = Query(False, description="Hide transactions that match the matching data"),
+    request: Request,
+    response: Response,
+    filters: TransactionFilters = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     Get total count of transactions matching the filters.
     Useful for pagination.
     """
-    query = db.query(Transaction)
+    query = filters.apply(db.query(Transaction), fts=fts_available(db))
     
-    # Filter out matched transactions if requested
-    if hide_matched:
-        matched_ids = get_matched_transaction_ids(db, debug=True)
-        logger.info(f"[count] hide_matched=True, filtering out {len(matched_ids)} IDs: {matched_ids}")
-        if matched_ids:
-            query = query.filter(~Transaction.id.in_(matched_ids))
+    if filters.hide_matched:
+        count = cached_match_result(db, request, response, query.count)
+    else:
+        count = query.count()
     
-    # Apply the same filters as list_transactions
-    if variable_symbol:
-        query = query.filter(Transaction.variable_symbol.ilike(f"%{variable_symbol}%"))
-    
-    if specific_symbol:
-        query = query.filter(Transaction.specific_symbol.ilike(f"%{specific_symbol}%"))
-    
-    if constant_symbol:
-        query = query.filter(Transaction.constant_symbol.ilike(f"%{constant_symbol}%"))
-    
-    if counter_account:
-        query = query.filter(Transaction.counter_account.ilike(f"%{counter_account}%"))
-    
-    if counter_account_name:
-        query = query.filter(Transaction.counter_account_name.ilike(f"%{counter_account_name}%"))
-    
-    if bank_code:
-        query = query.filter(Transaction.bank_code.ilike(f"%{bank_code}%"))
-    
-    if bank_name:
-        query = query.filter(Transaction.bank_name.ilike(f"%{bank_name}%"))
-    
-    if executor:
-        query = query.filter(Transaction.executor.ilike(f"%{executor}%"))
+    return {"count": count}
+
+class AggregateOut(BaseModel):
+    key: str
+    value: Union[int, float]
+
+@router.get("/transactions/aggregate", response_model=List[AggregateOut], dependencies=[Depends(check_etag)])
+def aggregate_transactions(
+    group_by: str = Query("day", pattern=f"^({'|'.join(GROUP_BY)})$", description="Group by day, month, counter_account or currency"),
+    metric: str = Query("sum", pattern=f"^({'|'.join(METRICS)})$", description="sum (of amounts) or count (of transactions)"),
+    date_from: Optional[date] = Query(None, description="Only transactions on or after this date"),
+    date_to: Optional[date] = Query(None, description="Only transactions on or before this date"),
+    currency: Optional[str] = Query(None, description="Filter by currency (exact match, e.g. CZK)"),
+    direction: Optional[str] = Query(None, pattern="^(incoming|outgoing)$", description="incoming (amount > 0) or outgoing (amount < 0)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Aggregate transaction amounts or counts for charts.
     
-    if transaction_id:
-        query = query.filter(Transaction.transaction_id.ilike(f"%{transaction_id}%"))
+    Served from the daily_rollup table, which is kept up to date on every
+    fetch, so the cost depends on the number of days, not transactions.
+    Transactions without a counter account are grouped under "".
+    """
+    try:
+        return aggregate(db, group_by, metric, date_from=date_from, date_to=date_to,
+                         currency=currency, direction=direction)
+    except Exception as e:
+        logger.error(f"Failed to aggregate transactions: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to aggregate transactions: {str(e)}")
+
+@router.get("/transactions/export")
+def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Output format (csv, ndjson)"),
+    compress: bool = Query(False, alias="gzip", description="Compress the output with gzip"),
+    filters: TransactionFilters = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Export all transactions matching the filters as CSV or NDJSON.
     
-    count = query.count()
+    Rows are streamed from a server-side cursor in chunks, so exports of any
+    size use constant memory.
+    """
+    stmt = filters.apply(export_select(), fts=fts_available(db))
+    filename = f"transactions.{format}" + (".gz" if compress else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        export_chunks(db.get_bind(), stmt, format, compress=compress),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers
+    )
+
+@router.post("/export/parquet")
+def export_parquet_snapshot(db: Session = Depends(get_db), export_dir: str = Depends(get_export_dir)):
+    """
+    Write transactions and matching data as Parquet files to the export directory.
     
-    return {"count": count}
+    Transactions are appended incrementally (only rows added since the last
+    export, partitioned by month); matching data is written as a full snapshot.
+    Same as running `fiofetch export-parquet`.
+    """
+    try:
+        return export_parquet(db.get_bind(), export_dir)
+    except Exception as e:
+        logger.error(f"Failed to export Parquet: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to export Parquet: {str(e)}")
 
 from fastapi import WebSocket, WebSocketDisconnect
 from .services import fetch_service
@@ -301,6 +370,7 @@ def get_current_config():
         "fio_token": masked_token,
         "fio_api_url": config.fio_api_url,
         "back_date_days": config.back_date_days,
+        "fetch_mode": config.fetch_mode,
         "static_dir": config.static_dir
     }
 
@@ -428,7 +498,10 @@ def delete_all_transactions(db: Session = Depends(get_db)):
     """
     try:
         count = db.query(Transaction).count()
+        db.query(TransactionMatch).delete()
         db.query(Transaction).delete()
+        rebuild_rollup(db)
+        bump_data_version(db)
         db.commit()
         logger.info(f"Deleted {count} transaction(s) from database")
         return {
@@ -463,13 +536,17 @@ class MatchingDataOut(BaseModel):
 
 # Matching Data Endpoints
 @router.post("/matching-data")
-def upload_matching_data(data: MatchingDataUpload, db: Session = Depends(get_db)):
+def upload_matching_data(
+    data: MatchingDataUpload,
+    db: Session = Depends(get_db),
+    match_workers: int = Depends(get_match_workers)
+):
     """
     Upload matching data from a file (CSV/TSV/XLSX processed in frontend).
     This will replace all existing matching data.
     """
     try:
-        # Delete existing matching data
+        # Delete existing matching data (matches are rebuilt below)
         db.query(MatchingData).delete()
         
         # Insert new matching data
@@ -480,10 +557,15 @@ def upload_matching_data(data: MatchingDataUpload, db: Session = Depends(get_db)
                 specific_symbol=row.specific_symbol,
                 constant_symbol=row.constant_symbol,
                 row_data=json.dumps(row.row_data) if row.row_data else None,
-                created_at=today
+                created_at=today,
+                **symbol_norms(row.variable_symbol, row.specific_symbol, row.constant_symbol)
             )
             db.add(matching_entry)
         
+        # Recompute all matches against the new matching set
+        db.flush()
+        rematch_all(db, workers=match_workers)
+        bump_data_version(db)
         db.commit()
         count = len(data.rows)
         logger.info(f"Uploaded {count} matching data row(s)")
@@ -497,7 +579,7 @@ def upload_matching_data(data: MatchingDataUpload, db: Session = Depends(get_db)
         logger.error(f"Failed to upload matching data: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to upload matching data: {str(e)}")
 
-@router.get("/matching-data", response_model=List[MatchingDataOut])
+@router.get("/matching-data", response_model=List[MatchingDataOut], dependencies=[Depends(check_etag)])
 def get_matching_data(db: Session = Depends(get_db)):
     """
     Get all matching data entries.
@@ -509,12 +591,12 @@ def get_matching_data(db: Session = Depends(get_db)):
         logger.error(f"Failed to get matching data: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get matching data: {str(e)}")
 
-@router.get("/matching-data/stats")
-def get_matching_stats(db: Session = Depends(get_db)):
+@router.get("/matching-data/stats", dependencies=[Depends(check_etag)])
+def get_matching_stats(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get statistics about matching data and how many transactions match.
     """
-    try:
+    def compute_stats():
         total_matching_rows = db.query(MatchingData).count()
         
         if total_matching_rows == 0:
@@ -529,7 +611,7 @@ def get_matching_stats(db: Session = Depends(get_db)):
         matched_transaction_ids = get_matched_transaction_ids(db, debug=True)
         total_transactions = db.query(Transaction).count()
         
-        logger.info(f"[stats] Matched IDs: {matched_transaction_ids}")
+        logger.debug(f"[stats] Matched {len(matched_transaction_ids)} transaction(s)")
         
         return {
             "total_matching_rows": total_matching_rows,
@@ -537,10 +619,134 @@ def get_matching_stats(db: Session = Depends(get_db)):
             "matched_transactions": len(matched_transaction_ids),
             "total_transactions": total_transactions
         }
+    
+    try:
+        return cached_match_result(db, request, response, compute_stats)
     except Exception as e:
         logger.error(f"Failed to get matching stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get matching stats: {str(e)}")
 
+class MatchingStatusOut(BaseModel):
+    id: int
+    variable_symbol: Optional[str]
+    specific_symbol: Optional[str]
+    constant_symbol: Optional[str]
+    row_data: Optional[str]
+    payment_count: int
+    paid_amount: float
+    last_payment_date: Optional[date]
+    state: str
+
+@router.get("/matching-data/status", response_model=List[MatchingStatusOut], dependencies=[Depends(check_etag)])
+def get_matching_status(
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    state: Optional[str] = Query(None, pattern="^(paid|unpaid)$", description="Filter by payment state (paid, unpaid)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the payment status of each matching data entry.
+    
+    Returns the matched transaction count, total amount and last payment
+    date per entry, computed with a single grouped join. An entry is "paid"
+    once at least one transaction matched it.
+    """
+    query = entry_totals_select()
+    payment_count = func.count(Transaction.id)
+    if state == "paid":
+        query = query.having(payment_count > 0)
+    elif state == "unpaid":
+        query = query.having(payment_count == 0)
+    
+    try:
+        rows = db.execute(query.order_by(MatchingData.id).offset(skip).limit(limit)).all()
+    except Exception as e:
+        logger.error(f"Failed to get matching status: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get matching status: {str(e)}")
+    
+    return [
+        {
+            **row._asdict(),
+            "state": "paid" if row.payment_count else "unpaid",
+        }
+        for row in rows
+    ]
+
+class ReconciliationRow(BaseModel):
+    id: int
+    variable_symbol: Optional[str]
+    specific_symbol: Optional[str]
+    constant_symbol: Optional[str]
+    expected_amount: Optional[float]
+    due_amount: Optional[float]
+    paid_amount: float
+    payment_count: int
+    last_payment_date: Optional[date]
+    state: str
+
+class ReconciliationOut(BaseModel):
+    summary: Dict[str, int]
+    rows: List[ReconciliationRow]
+
+@router.get("/matching-data/reconciliation", response_model=ReconciliationOut, dependencies=[Depends(check_etag)])
+def get_reconciliation(
+    amount_field: str = Query("amount", description="row_data key holding the expected amount (used when no splits are present)"),
+    state: Optional[str] = Query(None, description=f"Only return rows in this state ({', '.join(STATES)})"),
+    db: Session = Depends(get_db)
+):
+    """
+    Reconcile matching data against matched payments.
+    
+    Sums matched transaction amounts per entry and compares them with the
+    expected amount or split schedule in row_data. Each entry is classified
+    as paid, partial, overpaid, overdue, unpaid or unknown (no expected amount).
+    """
+    if state is not None and state not in STATES:
+        raise HTTPException(status_code=400, detail=f"Invalid state '{state}'. Use one of: {', '.join(STATES)}")
+    
+    try:
+        rows = reconcile(db, amount_field=amount_field)
+    except Exception as e:
+        logger.error(f"Failed to reconcile matching data: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to reconcile matching data: {str(e)}")
+    
+    summary = {s: 0 for s in STATES}
+    for row in rows:
+        summary[row["state"]] += 1
+    
+    if state is not None:
+        rows = [row for row in rows if row["state"] == state]
+    
+    return {"summary": summary, "rows": rows}
+
+class MatchCandidateOut(BaseModel):
+    tx_id: int
+    transaction_id: str
+    matching_data_id: int
+    confidence: str
+    fields: List[str]
+
+@router.get("/matching-data/candidates", response_model=List[MatchCandidateOut], dependencies=[Depends(check_etag)])
+def get_match_candidates(
+    request: Request,
+    response: Response,
+    confidence: Optional[str] = Query(None, description="Only return candidates with this confidence (high, low)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Find candidate matches for unmatched transactions whose symbols were
+    typed into free-text fields (message, comment, ...) instead of VS/SS.
+    """
+    try:
+        candidates = cached_match_result(db, request, response, lambda: find_candidates(db))
+    except Exception as e:
+        logger.error(f"Failed to find match candidates: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to find match candidates: {str(e)}")
+    
+    if confidence is not None:
+        candidates = [c for c in candidates if c["confidence"] == confidence]
+    return candidates
+
 @router.delete("/matching-data")
 def delete_matching_data(db: Session = Depends(get_db)):
     """
@@ -548,7 +754,9 @@ def delete_matching_data(db: Session = Depends(get_db)):
     """
     try:
         count = db.query(MatchingData).count()
+        db.query(TransactionMatch).delete()
         db.query(MatchingData).delete()
+        bump_data_version(db)
         db.commit()
         logger.info(f"Deleted {count} matching data row(s)")
         return {
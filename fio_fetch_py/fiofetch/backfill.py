@@ -0,0 +1,123 @@
+"""
+Chunked download of transaction history (`fiofetch backfill`).
+
+A long date range is split into period chunks that are downloaded one by one,
+at most one Fio API request per FIO_REQUEST_SPACING seconds. Each chunk is
+saved while it downloads (see fio.save_statement()): transactions go to the
+database writer thread in batches, so memory use does not depend on the
+size of a chunk.
+
+The end of a saved chunk is stored in backfill_progress, in the same
+transaction as its last batch of rows, so an interrupted backfill resumes
+after the last complete chunk (rows of a partly saved chunk are skipped as
+already stored). Progress carries over to runs with the same start and a
+later end, such as a rerun on another day with the default end of today. Every batch bumps the data version (see cache.py), so a
+server running on the database drops its cached results and ETags as rows
+land.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import func, select
+from .fio import fetch_period, save_statement
+from .models import BackfillProgress
+
+logger = logging.getLogger(__name__)
+
+# Fio allows one request per token every 30 seconds
+FIO_REQUEST_SPACING = 30
+
+DEFAULT_CHUNK_DAYS = 30
+
+
+def period_chunks(date_from: date, date_to: date, chunk_days: int = DEFAULT_CHUNK_DAYS) -> List[Tuple[date, date]]:
+    """Split an inclusive date range into consecutive inclusive chunks of at most chunk_days days."""
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+    chunks = []
+    start = date_from
+    while start <= date_to:
+        end = min(start + timedelta(days=chunk_days - 1), date_to)
+        chunks.append((start, end))
+        start = end + timedelta(days=1)
+    return chunks
+
+
+def _load_progress(session, date_from: date, date_to: date) -> BackfillProgress:
+    progress = session.get(BackfillProgress, (date_from, date_to))
+    if progress is None:
+        # Earlier runs from the same day saved everything up to their
+        # completed_to, whatever end they were started with
+        completed_to = session.scalar(
+            select(func.max(BackfillProgress.completed_to)).where(BackfillProgress.date_from == date_from)
+        )
+        if completed_to is not None:
+            completed_to = min(completed_to, date_to)
+        progress = BackfillProgress(
+            date_from=date_from, date_to=date_to, completed_to=completed_to, updated_at=datetime.now()
+        )
+        session.add(progress)
+        session.commit()
+    return progress
+
+
+def _chunk_completed(progress: BackfillProgress, chunk_end: date) -> Callable:
+    """Record a chunk as completed (applied in the commit of its last batch)."""
+    def finish(session):
+        progress.completed_to = chunk_end
+        progress.updated_at = datetime.now()
+    return finish
+
+
+async def backfill(
+    token: str,
+    api_url: str,
+    session,
+    date_from: date,
+    date_to: date,
+    chunk_days: int = DEFAULT_CHUNK_DAYS,
+    spacing: float = FIO_REQUEST_SPACING,
+    progress_callback: Optional[Callable[[date, date, int, int], None]] = None,
+) -> dict:
+    """
+    Download and save all transactions between date_from and date_to.
+
+    Args:
+        token: Fio Bank API token
+        api_url: Base API URL
+        session: Database session
+        date_from, date_to: Inclusive date range
+        chunk_days: Days per request
+        spacing: Seconds between API requests
+        progress_callback: Called with (chunk start, chunk end, inserted, skipped)
+            after each saved chunk
+
+    Returns:
+        Summary with the number of chunks downloaded, rows inserted and skipped
+    """
+    if date_from > date_to:
+        raise ValueError("date_from must not be after date_to")
+    progress = _load_progress(session, date_from, date_to)
+    start = date_from
+    if progress.completed_to is not None:
+        logger.info(f"Resuming backfill after {progress.completed_to}")
+        start = progress.completed_to + timedelta(days=1)
+    chunks = period_chunks(start, date_to, chunk_days)
+
+    summary = {'chunks': 0, 'inserted': 0, 'skipped': 0}
+    last_request = None
+    for start, end in chunks:
+        if last_request is not None:
+            await asyncio.sleep(max(0.0, last_request + spacing - time.monotonic()))
+        last_request = time.monotonic()
+        async with fetch_period(token, api_url, start, end) as statement:
+            inserted, skipped = await save_statement(session, statement, finish=_chunk_completed(progress, end))
+        summary['chunks'] += 1
+        summary['inserted'] += inserted
+        summary['skipped'] += skipped
+        logger.info(f"Backfilled {start} to {end}: {inserted} new, {skipped} already stored")
+        if progress_callback:
+            progress_callback(start, end, inserted, skipped)
+    return summary
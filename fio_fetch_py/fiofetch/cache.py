@@ -0,0 +1,134 @@
+"""
+Cache for results that depend on matching, and the data version behind it.
+
+Every write that can change API results (inserting or deleting transactions,
+uploading or deleting matching data, migrations) bumps the version stored in
+the one-row data_version table, in the same database transaction as the
+write. Writers in other processes (the `fiofetch backfill` command, other
+server workers) therefore invalidate this process's cache entries and ETags
+as well. Cached values are tagged with the version they were computed at,
+and the same version tags the ETags of the read endpoints (see data_etag()).
+"""
+import hashlib
+import secrets
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+from .models import DataVersion
+
+_DATA_VERSION_ID = 1
+
+
+def ensure_data_version(db):
+    """Create the data version row if it is missing."""
+    db.execute(
+        insert(DataVersion)
+        .values(id=_DATA_VERSION_ID, token=secrets.token_hex(4), version=0)
+        .on_conflict_do_nothing(index_elements=['id'])
+    )
+
+
+def bump_data_version(db):
+    """
+    Record a data change. Runs in the caller's transaction, so the new
+    version becomes visible together with the change it describes.
+
+    Args:
+        db: Session or Connection to run the statement on
+    """
+    ensure_data_version(db)
+    db.execute(
+        update(DataVersion)
+        .where(DataVersion.id == _DATA_VERSION_ID)
+        .values(version=DataVersion.version + 1)
+    )
+
+
+def read_data_version(db) -> str:
+    """Current data version as an opaque string ("<token>-<version>")."""
+    row = db.execute(
+        select(DataVersion.token, DataVersion.version).where(DataVersion.id == _DATA_VERSION_ID)
+    ).first()
+    return f"{row[0]}-{row[1]}" if row else "0"
+
+
+def data_etag(data_version: str, *parts) -> str:
+    """
+    Weak ETag for a response computed at data_version.
+
+    Args:
+        data_version: Value of read_data_version()
+        parts: Whatever else the response depends on (path, query parameters)
+    """
+    digest = hashlib.blake2s(repr(parts).encode('utf-8'), digest_size=8).hexdigest()
+    return f'W/"{data_version}-{digest}"'
+
+
+class GenerationCache:
+    """
+    Cache of computed values valid for a single data version.
+
+    Concurrent callers asking for the same key share one computation in
+    flight instead of each running it. Entries of other versions are
+    dropped, and at most max_entries are kept (oldest evicted first).
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[Hashable, Future]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, generation: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return the cached value for key, computing it if needed.
+
+        Read the generation (data version) before computing, so a result
+        computed while a write happens is stored under the old version and
+        not reused.
+
+        Returns:
+            Tuple of (value, hit) where hit is False if this call computed it
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self.hits += 1
+                future, hit = entry[1], True
+            else:
+                self.misses += 1
+                future, hit = Future(), False
+                self._evict(generation)
+                self._entries[key] = (generation, future)
+
+        if hit:
+            return future.result(), True
+
+        try:
+            future.set_result(compute())
+        except BaseException as e:
+            future.set_exception(e)
+            # Don't cache failures
+            with self._lock:
+                if self._entries.get(key, (None, None))[1] is future:
+                    del self._entries[key]
+            raise
+        return future.result(), False
+
+    def _evict(self, generation: Hashable):
+        """Drop stale entries and make room for one more. Caller holds the lock."""
+        stale = [key for key, (entry_generation, _) in self._entries.items() if entry_generation != generation]
+        for key in stale:
+            del self._entries[key]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+match_cache = GenerationCache()
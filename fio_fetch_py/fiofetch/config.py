@@ -12,12 +12,17 @@ def get_config():
     p.add('--fio-token', required=False, env_var='FIO_FETCH_TOKEN', help='Fio Bank API Token')
     p.add('--fio-api-url', default='https://fioapi.fio.cz/v1/rest', env_var='FIO_FETCH_API_URL', help='Fio Bank API base URL')
     p.add('--back-date-days', default=3, type=int, env_var='FIO_FETCH_BACK_DATE_DAYS', help='Number of days to set as history limit (zarážka)')
+    p.add('--fetch-mode', default='window', choices=['window', 'incremental'], env_var='FIO_FETCH_FETCH_MODE', help='window: download the last back-date-days days on every fetch; incremental: only movements since the previous fetch')
+    p.add('--match-workers', default=1, type=int, env_var='FIO_FETCH_MATCH_WORKERS', help='Worker processes for bulk matching (1 = single in-database join)')
+    p.add('--export-dir', default='~/.config/fio_fetch/export', env_var='FIO_FETCH_EXPORT_DIR', help='Directory for Parquet exports (fiofetch export-parquet)')
+    p.add('--compress-min-size', default=1024, type=int, env_var='FIO_FETCH_COMPRESS_MIN_SIZE', help='Minimum response size in bytes to gzip/brotli compress (negative disables)')
     p.add('--static-dir', default='static', env_var='FIO_FETCH_STATIC_DIR', help='Directory for static files')
     
     options = p.parse_args()
     
     # Expand user paths
     options.db_path = os.path.expanduser(options.db_path)
+    options.export_dir = os.path.expanduser(options.export_dir)
     if options.static_dir:
         options.static_dir = os.path.expanduser(options.static_dir)
         
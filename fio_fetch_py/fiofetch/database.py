@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
 
 Base = declarative_base()
@@ -31,4 +31,64 @@ def get_session_local(engine):
     return scoped_session(session_factory)
 
 def init_db(engine):
+    existing_tables = set(inspect(engine).get_table_names())
     Base.metadata.create_all(bind=engine)
+    migrate_db(engine, existing_tables)
+
+def migrate_db(engine, existing_tables=None):
+    """
+    Bring a database created by an older version up to the current schema.
+    
+    create_all() only creates missing tables, so columns and indexes added to
+    existing tables later are created here. Rows of existing tables get their
+    derived columns and tables backfilled, which bumps the data version.
+    
+    Args:
+        engine: SQLAlchemy engine
+        existing_tables: Names of the tables present before create_all() ran
+    """
+    inspector = inspect(engine)
+    added_columns = set()
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added_columns.add(column.name)
+            
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    
+    from .cache import bump_data_version, ensure_data_version
+    with engine.begin() as conn:
+        ensure_data_version(conn)
+    data_changed = False
+    
+    if added_columns & {"vs_norm", "ss_norm", "ks_norm"}:
+        from .matching import backfill_symbol_norms
+        backfill_symbol_norms(engine)
+        data_changed = True
+    
+    from .search import ensure_fts
+    ensure_fts(engine)
+    
+    if existing_tables is not None and "transaction_match" not in existing_tables:
+        from .matching import rematch_all
+        with engine.begin() as conn:
+            rematch_all(conn)
+            bump_data_version(conn)
+    
+    if existing_tables is not None:
+        from .rollup import rebuild_rollup, rollup_outdated
+        with engine.begin() as conn:
+            if "daily_rollup" not in existing_tables or rollup_outdated(conn):
+                rebuild_rollup(conn)
+                bump_data_version(conn)
+    
+    if data_changed:
+        with engine.begin() as conn:
+            bump_data_version(conn)
@@ -0,0 +1,139 @@
+"""
+Streaming export of transactions as CSV or NDJSON.
+
+Rows are read from the database in batches through a streaming cursor and
+encoded straight to bytes, so memory use stays constant no matter how many
+transactions are exported.
+
+The same row tuples also back the JSON body of /transactions (json_rows()),
+which skips ORM objects and per-row model validation. orjson is used for
+encoding when installed, with the standard json module as the fallback.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from typing import Iterable, Iterator, Sequence
+from sqlalchemy import select
+from .models import Transaction
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Exported columns, in the same order as the /transactions response
+EXPORT_COLUMNS = (
+    'id',
+    'transaction_id',
+    'date',
+    'amount',
+    'currency',
+    'counter_account',
+    'counter_account_name',
+    'bank_code',
+    'bank_name',
+    'constant_symbol',
+    'variable_symbol',
+    'specific_symbol',
+    'user_identification',
+    'message_for_recipient',
+    'type',
+    'executor',
+    'specification',
+    'comment',
+    'bic',
+    'instruction_id',
+    'payer_reference',
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+BATCH_SIZE = 1000
+
+
+def export_select():
+    """SELECT of the exported columns in list order (newest first)."""
+    return select(*(getattr(Transaction, name) for name in EXPORT_COLUMNS)).order_by(
+        Transaction.date.desc(), Transaction.id.desc()
+    )
+
+
+def iter_batches(engine, stmt, batch_size: int = BATCH_SIZE) -> Iterator[Sequence]:
+    """Yield lists of row tuples from a streaming cursor on its own connection."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for partition in result.partitions():
+            yield partition
+
+
+def csv_chunks(batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """Encode row batches as CSV with a header line, one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Same output as Starlette's JSONResponse
+_json_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_default).encode
+
+
+def json_rows(rows: Iterable[Sequence]) -> bytes:
+    """Encode row tuples of EXPORT_COLUMNS as a JSON array of objects."""
+    objects = [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(objects)
+    return _json_encode(objects).encode('utf-8')
+
+
+def ndjson_chunks(batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """Encode row batches as newline-delimited JSON objects."""
+    if orjson is not None:
+        for batch in batches:
+            yield b''.join(orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b'\n' for row in batch)
+        return
+    dumps = json.JSONEncoder(ensure_ascii=False, default=_json_default).encode
+    for batch in batches:
+        yield ''.join(dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in batch).encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a chunk stream into a single gzip stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_chunks(engine, stmt, fmt: str, compress: bool = False) -> Iterator[bytes]:
+    """
+    Stream the rows selected by stmt in the given format.
+
+    Args:
+        engine: Engine to open the streaming connection on
+        stmt: SELECT of EXPORT_COLUMNS (see export_select())
+        fmt: 'csv' or 'ndjson'
+        compress: gzip the output
+    """
+    encoder = csv_chunks if fmt == 'csv' else ndjson_chunks
+    chunks = encoder(iter_batches(engine, stmt))
+    return gzip_chunks(chunks) if compress else chunks
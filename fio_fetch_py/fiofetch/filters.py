@@ -0,0 +1,109 @@
+"""
+Filter compiler shared by the transaction endpoints.
+
+The list, count and export endpoints accept the same query parameters.
+TransactionFilters declares them once (use it with Depends()) and compiles
+them into SQLAlchemy WHERE clauses.
+"""
+from datetime import date
+from typing import List, Optional
+from fastapi import Query
+from sqlalchemy import select
+from .models import Transaction
+from .matching import is_matched
+from .search import FTS_COLUMNS, MIN_PATTERN_LENGTH, fts_table
+
+# Columns filtered by case-insensitive substring match (all mirrored in the
+# full-text index)
+SUBSTRING_FIELDS = FTS_COLUMNS
+
+
+class TransactionFilters:
+    """Transaction filter query parameters."""
+
+    def __init__(
+        self,
+        variable_symbol: Optional[str] = Query(None, description="Filter by Variable Symbol (substring match)"),
+        specific_symbol: Optional[str] = Query(None, description="Filter by Specific Symbol (substring match)"),
+        constant_symbol: Optional[str] = Query(None, description="Filter by Constant Symbol (substring match)"),
+        counter_account: Optional[str] = Query(None, description="Filter by Counter Account (substring match)"),
+        counter_account_name: Optional[str] = Query(None, description="Filter by Counter Account Name (substring match)"),
+        bank_code: Optional[str] = Query(None, description="Filter by Bank Code (substring match)"),
+        bank_name: Optional[str] = Query(None, description="Filter by Bank Name (substring match)"),
+        executor: Optional[str] = Query(None, description="Filter by Executor (substring match)"),
+        transaction_id: Optional[str] = Query(None, description="Filter by Transaction ID (substring match)"),
+        hide_matched: bool = Query(False, description="Hide transactions that match the matching data"),
+        date_from: Optional[date] = Query(None, description="Only transactions on or after this date"),
+        date_to: Optional[date] = Query(None, description="Only transactions on or before this date"),
+        amount_min: Optional[float] = Query(None, description="Minimum amount (inclusive)"),
+        amount_max: Optional[float] = Query(None, description="Maximum amount (inclusive)"),
+        currency: Optional[str] = Query(None, description="Filter by currency (exact match, e.g. CZK)"),
+        direction: Optional[str] = Query(None, pattern="^(incoming|outgoing)$", description="incoming (amount > 0) or outgoing (amount < 0)"),
+    ):
+        self.variable_symbol = variable_symbol
+        self.specific_symbol = specific_symbol
+        self.constant_symbol = constant_symbol
+        self.counter_account = counter_account
+        self.counter_account_name = counter_account_name
+        self.bank_code = bank_code
+        self.bank_name = bank_name
+        self.executor = executor
+        self.transaction_id = transaction_id
+        self.hide_matched = hide_matched
+        self.date_from = date_from
+        self.date_to = date_to
+        self.amount_min = amount_min
+        self.amount_max = amount_max
+        self.currency = currency
+        self.direction = direction
+
+    def conditions(self, fts: bool = False) -> List:
+        """
+        Compile the filters into a list of WHERE clauses.
+
+        Args:
+            fts: Serve substring filters from the trigram index (see search.py)
+        """
+        conditions = []
+
+        # Filter out matched transactions if requested
+        if self.hide_matched:
+            conditions.append(~is_matched())
+
+        # Range filters (served by the (date, id) and (currency, amount) indexes)
+        if self.date_from is not None:
+            conditions.append(Transaction.date >= self.date_from)
+        if self.date_to is not None:
+            conditions.append(Transaction.date <= self.date_to)
+        if self.currency:
+            conditions.append(Transaction.currency == self.currency.upper())
+        if self.amount_min is not None:
+            conditions.append(Transaction.amount >= self.amount_min)
+        if self.amount_max is not None:
+            conditions.append(Transaction.amount <= self.amount_max)
+        if self.direction == 'incoming':
+            conditions.append(Transaction.amount > 0)
+        elif self.direction == 'outgoing':
+            conditions.append(Transaction.amount < 0)
+
+        # Substring matching (case-insensitive)
+        fts_conditions = []
+        for field in SUBSTRING_FIELDS:
+            value = getattr(self, field)
+            if not value:
+                continue
+            pattern = f"%{value}%"
+            if fts and len(value) >= MIN_PATTERN_LENGTH:
+                fts_conditions.append(fts_table.c[field].like(pattern))
+            else:
+                conditions.append(getattr(Transaction, field).ilike(pattern))
+
+        if fts_conditions:
+            conditions.append(Transaction.id.in_(select(fts_table.c.rowid).where(*fts_conditions)))
+
+        return conditions
+
+    def apply(self, query, fts: bool = False):
+        """Apply the filters to a Query or Select."""
+        conditions = self.conditions(fts=fts)
+        return query.where(*conditions) if conditions else query
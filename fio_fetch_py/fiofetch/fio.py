@@ -1,15 +1,34 @@
 import aiohttp
+import hashlib
+import ijson
+from contextlib import AsyncExitStack
+from typing import AsyncIterable, AsyncIterator, Callable, Iterator, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timedelta
-from .models import Transaction
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from .models import Transaction, FetchCursor
+from .matching import symbol_norms, match_new_transactions
+from .rollup import update_rollup
 from .utils import mask_token
+from .cache import bump_data_version
+from .writer import db_writer
 import logging
-import json
 import os
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT when saving transactions
+INSERT_CHUNK_SIZE = 500
+
+# Fio timestamps are midnight of the booking day in Czech time
+try:
+    FIO_TIMEZONE = ZoneInfo('Europe/Prague')
+except ZoneInfoNotFoundError:
+    FIO_TIMEZONE = None  # Local time
+
 def parse_fio_date(date_value):
     """
     Parse date from Fio API response.
@@ -23,10 +42,10 @@ def parse_fio_date(date_value):
     if date_value is None:
         return None
     
-    # If it's a number, treat as timestamp in milliseconds
+    # If it's a number, treat as timestamp in milliseconds (midnight in Prague)
     if isinstance(date_value, (int, float)):
         try:
-            return datetime.fromtimestamp(date_value / 1000).date()
+            return datetime.fromtimestamp(date_value / 1000, FIO_TIMEZONE).date()
         except (ValueError, OSError, OverflowError):
             logger.warning(f"Failed to parse timestamp: {date_value}")
             return None
@@ -38,7 +57,7 @@ def parse_fio_date(date_value):
         date_str = date_value.split('+')[0]
         try:
             # Parse YYYY-MM-DD format
-            return datetime.strptime(date_str, '%Y-%m-%d').date()
+            return date.fromisoformat(date_str)
         except ValueError:
             logger.warning(f"Failed to parse date string: {date_value}")
             return None
@@ -51,125 +70,472 @@ def load_example_transactions():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     example_file = os.path.join(current_dir, '..', 'examples', 'tr.json')
     
-    with open(example_file, 'r') as f:
-        data = json.load(f)
+    with open(example_file, 'rb') as f:
+        return list(StatementReader().iter_file(f))
+
+
+def _to_str(value) -> str:
+    return str(value)
+
+
+# Fio statement columns: (column id, transactions table column, converter)
+# Converters are only applied to values that are present.
+FIO_COLUMNS = (
+    (22, 'transaction_id', _to_str),      # ID pohybu
+    (0, 'date', parse_fio_date),          # Datum
+    (1, 'amount', float),                 # Objem
+    (14, 'currency', None),               # Měna
+    (2, 'counter_account', None),         # Protiúčet
+    (10, 'counter_account_name', None),   # Název protiúčtu
+    (3, 'bank_code', None),               # Kód banky
+    (12, 'bank_name', None),              # Název banky
+    (4, 'constant_symbol', None),         # KS
+    (5, 'variable_symbol', None),         # VS
+    (6, 'specific_symbol', None),         # SS
+    (7, 'user_identification', None),     # Uživatelská identifikace
+    (16, 'message_for_recipient', None),  # Zpráva pro příjemce
+    (8, 'type', None),                    # Typ pohybu
+    (9, 'executor', None),                # Provedl
+    (18, 'specification', None),          # Upřesnění
+    (25, 'comment', None),                # Komentář
+    (26, 'bic', None),                    # BIC
+    (17, 'instruction_id', _to_str),      # ID pokynu
+    (27, 'payer_reference', None),        # Reference plátce
+)
+
+# Precompiled lookup: JSON key ("columnN") -> (field, converter)
+_COLUMN_DECODERS = {f'column{number}': (field, converter) for number, field, converter in FIO_COLUMNS}
+_EMPTY_TRANSACTION = dict.fromkeys(field for _, field, _ in FIO_COLUMNS)
+
+
+def parse_transaction(tr: dict) -> dict:
+    """
+    Decode one transaction object of a Fio API statement.
+    
+    Walks the columns present in a single pass using FIO_COLUMNS; fields of
+    missing columns are None. Unknown columns are ignored.
+    
+    Returns:
+        Dictionary of the transactions table columns in FIO_COLUMNS
+    """
+    transaction = _EMPTY_TRANSACTION.copy()
+    for key, column in tr.items():
+        decoder = _COLUMN_DECODERS.get(key)
+        if decoder is None or not column:
+            continue
+        value = column.get('value')
+        field, converter = decoder
+        transaction[field] = value if converter is None or value is None else converter(value)
+    return transaction
+
+
+def parse_statement(data: dict) -> Tuple[dict, List[dict]]:
+    """
+    Parse a Fio API statement (same structure as tr.json).
+    
+    Returns:
+        Tuple of (accountStatement.info, list of transaction dictionaries)
+    """
+    statement = data.get('accountStatement', {})
+    info = statement.get('info') or {}
+    transaction_list = (statement.get('transactionList') or {}).get('transaction', [])
+    return info, [parse_transaction(tr) for tr in transaction_list]
+
+
+class StatementReader:
+    """
+    Incremental parser of Fio API statements.
+    
+    Transactions are yielded one by one while the document is read, so
+    neither the raw statement nor its full JSON tree is ever held in memory.
+    info is filled in when accountStatement.info has been read; Fio sends it
+    before the transaction list.
+    """
+    
+    INFO_PREFIX = 'accountStatement.info'
+    TRANSACTION_PREFIX = 'accountStatement.transactionList.transaction.item'
+    READ_SIZE = 64 * 1024
     
-    # Parse the Fio API JSON format
-    transactions = []
-    transaction_list = data.get('accountStatement', {}).get('transactionList', {}).get('transaction', [])
+    def __init__(self):
+        self.info: dict = {}
     
-    for tr in transaction_list:
-        # Extract values from the column structure
-        def get_column_value(col_name):
-            col = tr.get(col_name)
-            return col.get('value') if col else None
+    def _info_tap(self):
+        """
+        Return a function to pass every chunk read through.
+        
+        It feeds the chunks to a push parser until accountStatement.info is
+        complete, while ijson.items reads the transactions from the same chunks.
+        """
+        infos = ijson.sendable_list()
+        parser = ijson.items_coro(infos, self.INFO_PREFIX, use_float=True)
         
-        # Parse date (handles both timestamp and date string formats)
-        date_value = get_column_value('column0')
-        trans_date = parse_fio_date(date_value)
+        def tap(chunk: bytes) -> bytes:
+            nonlocal parser
+            if parser is not None and chunk:
+                parser.send(chunk)
+                if infos:
+                    self.info = infos[0] or {}
+                    parser = None
+            return chunk
         
-        transaction_data = {
-            'transaction_id': str(get_column_value('column22')),
-            'date': trans_date,
-            'amount': get_column_value('column1'),
-            'currency': get_column_value('column14'),
-            'account_number': get_column_value('column2'),
-            'account_name': get_column_value('column10'),
-            'bank_code': get_column_value('column3'),
-            'bank_name': get_column_value('column12'),
-            'constant_symbol': get_column_value('column4'),
-            'variable_symbol': get_column_value('column5'),
-            'specific_symbol': get_column_value('column6'),
-            'user_identification': get_column_value('column7'),
-            'recipient_message': get_column_value('column16'),
-            'type': get_column_value('column8'),
-            'executor': get_column_value('column9'),
-            'specification': get_column_value('column18'),
-            'comment': get_column_value('column25'),
-            'bic': get_column_value('column26'),
-            'instruction_id': get_column_value('column17')
-        }
-        transactions.append(transaction_data)
-    
-    return transactions
-
-
-async def fetch_transactions_from_fio(token: str, api_url: str, back_date_days: int):
+        return tap
+    
+    def iter_file(self, f) -> Iterator[dict]:
+        """Yield the transactions of a statement read from a binary file."""
+        source = _TappedFile(f, self._info_tap())
+        for item in ijson.items(source, self.TRANSACTION_PREFIX, use_float=True, buf_size=self.READ_SIZE):
+            yield parse_transaction(item)
+    
+    async def iter_async(self, stream) -> AsyncIterator[dict]:
+        """Yield the transactions of a statement read from an async stream (e.g. aiohttp's response.content)."""
+        source = _TappedStream(stream, self._info_tap())
+        async for item in ijson.items_async(source, self.TRANSACTION_PREFIX, use_float=True, buf_size=self.READ_SIZE):
+            yield parse_transaction(item)
+
+
+class _TappedFile:
+    def __init__(self, f, tap):
+        self.f, self.tap = f, tap
+    
+    def read(self, n: int = -1) -> bytes:
+        return self.tap(self.f.read(n))
+
+
+class _TappedStream:
+    def __init__(self, stream, tap):
+        self.stream, self.tap = stream, tap
+    
+    async def read(self, n: int = -1) -> bytes:
+        return self.tap(await self.stream.read(n))
+
+
+class FioApiError(Exception):
+    """Error response from the Fio API."""
+    
+    def __init__(self, status: int, text: str):
+        super().__init__(f"Fio API returned status {status}: {text}")
+        self.status = status
+
+
+def _rest_url(api_url: str, path: str) -> str:
+    # Remove trailing /v1/rest if present in api_url
+    base_url = api_url.rstrip('/').replace('/v1/rest', '')
+    return f"{base_url}/v1/rest/{path}"
+
+
+async def _get(url: str) -> str:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise FioApiError(response.status, error_text)
+            
+            return await response.text()
+
+
+class StatementDownload:
     """
-    Fetch transactions from Fio Bank API using direct REST calls.
+    A Fio API statement, parsed while it is downloaded.
     
-    Args:
-        token: Fio Bank API token
-        api_url: Base API URL (e.g., 'https://fioapi.fio.cz/v1/rest')
-        back_date_days: Number of days back to fetch from (e.g., 3 means last 3 days)
+    Use as an async context manager (the request is made on entering and
+    non-200 responses raise FioApiError); iterating it then yields the
+    transactions as they arrive (see StatementReader). info is complete once
+    the transactions have been read.
+    """
     
-    Returns:
-        List of transaction dictionaries
+    def __init__(self, url: str):
+        self.url = url
+        self.reader = StatementReader()
+        self._response = None
+        self._stack = None
+    
+    @property
+    def info(self) -> dict:
+        return self.reader.info
+    
+    async def __aenter__(self) -> 'StatementDownload':
+        async with AsyncExitStack() as stack:
+            session = await stack.enter_async_context(aiohttp.ClientSession())
+            # The body is read while batches are saved, so a large statement
+            # can take longer than 30 s in total; limit inactivity instead
+            response = await stack.enter_async_context(
+                session.get(self.url, timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30))
+            )
+            if response.status != 200:
+                error_text = await response.text()
+                raise FioApiError(response.status, error_text)
+            self._response = response
+            self._stack = stack.pop_all()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self._stack.aclose()
+    
+    def __aiter__(self) -> AsyncIterator[dict]:
+        return self.reader.iter_async(self._response.content)
+
+
+class ParsedStatement:
+    """An already parsed statement, usable wherever a StatementDownload is."""
+    
+    def __init__(self, transactions: List[dict], info: dict = None):
+        self.transactions = transactions
+        self.info = info or {}
+    
+    async def __aenter__(self) -> 'ParsedStatement':
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        pass
+    
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        for transaction in self.transactions:
+            yield transaction
+
+
+def _get_statement(url: str) -> StatementDownload:
+    return StatementDownload(url)
+
+
+def fetch_period(token: str, api_url: str, from_date: date, to_date: date) -> StatementDownload:
     """
-    # Calculate date range
-    today = datetime.now().date()
-    from_date = today - timedelta(days=back_date_days)
+    Fetch the statement of a date range (both ends inclusive).
     
+    Returns:
+        StatementDownload to enter and iterate (async with / async for)
+    """
     # Format dates as YYYY-MM-DD
     from_date_str = from_date.strftime('%Y-%m-%d')
-    to_date_str = today.strftime('%Y-%m-%d')
+    to_date_str = to_date.strftime('%Y-%m-%d')
     
     # Build URL: /v1/rest/periods/{token}/{from_date}/{to_date}/transactions.json
-    # Remove trailing /v1/rest if present in api_url
-    base_url = api_url.rstrip('/').replace('/v1/rest', '')
-    url = f"{base_url}/v1/rest/periods/{token}/{from_date_str}/{to_date_str}/transactions.json"
+    url = _rest_url(api_url, f"periods/{token}/{from_date_str}/{to_date_str}/transactions.json")
     
     logger.info(f"Fetching transactions from {from_date_str} to {to_date_str}")
+    return _get_statement(url)
+
+
+def fetch_statement(token: str, api_url: str, back_date_days: int) -> StatementDownload:
+    """Fetch the statement of the last back_date_days days (window mode), see fetch_period()."""
+    today = datetime.now().date()
+    return fetch_period(token, api_url, today - timedelta(days=back_date_days), today)
+
+
+def fetch_last_statement(token: str, api_url: str) -> StatementDownload:
+    """Fetch the movements since Fio's last download pointer (and move the pointer)."""
+    logger.info("Fetching transactions since the last download")
+    return _get_statement(_rest_url(api_url, f"last/{token}/transactions.json"))
+
+
+async def set_last_id(token: str, api_url: str, last_id: int):
+    """Move Fio's last download pointer to the given movement id."""
+    logger.info(f"Setting the last download pointer to movement {last_id}")
+    await _get(_rest_url(api_url, f"set-last-id/{token}/{last_id}/"))
+
+
+def token_fingerprint(token: str) -> str:
+    """Stable, non-reversible identifier of a token (stored with the fetch cursor)."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+
+def _advance_cursor(session: Session, token: str, info: dict, synced: bool):
+    """Stage the cursor at info.idTo (kept if the statement has no movements)."""
+    account_id, id_to = info.get('accountId'), info.get('idTo')
+    if account_id is None or id_to is None:
+        return
+    cursor = session.get(FetchCursor, str(account_id))
+    if cursor is None:
+        cursor = FetchCursor(account_id=str(account_id), last_id=id_to)
+        session.add(cursor)
+    cursor.last_id = max(cursor.last_id, id_to)
+    cursor.token_fingerprint = token_fingerprint(token)
+    cursor.synced = synced
+    cursor.updated_at = datetime.now()
+
+
+async def fetch_incremental(token: str, api_url: str, back_date_days: int, session: Session,
+                            progress_callback=None) -> Tuple[int, int]:
+    """
+    Fetch and save only the movements added since the previous fetch.
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"Fio API returned status {response.status}: {error_text}")
-            
-            data = await response.json()
+    Fio keeps a per-token "last download" pointer and /last returns the
+    movements after it. The id of the newest saved movement is also stored in
+    fetch_cursor, so the pointer can be checked and restored:
     
-    # Parse the Fio API JSON format (same structure as tr.json)
-    transactions = []
-    transaction_list = data.get('accountStatement', {}).get('transactionList', {}).get('transaction', [])
+    - no cursor yet (or it was dropped): fetch the back_date_days window and
+      store the cursor
+    - cursor not synced with Fio yet: move Fio's pointer to it (set-last-id);
+      no movements are downloaded in this run
+    - otherwise: download /last. If Fio's pointer had moved past the cursor
+      (another client downloaded in between), movements may be missing, so
+      the cursor is dropped and the next fetch uses the window again
     
-    for tr in transaction_list:
-        # Extract values from the column structure
-        def get_column_value(col_name):
-            col = tr.get(col_name)
-            return col.get('value') if col else None
-        
-        # Parse date (handles both timestamp and date string formats)
-        date_value = get_column_value('column0')
-        trans_date = parse_fio_date(date_value)
-        
-        transaction_data = {
-            'transaction_id': str(get_column_value('column22')),
-            'date': trans_date,
-            'amount': get_column_value('column1'),
-            'currency': get_column_value('column14'),
-            'account_number': get_column_value('column2'),
-            'account_name': get_column_value('column10'),
-            'bank_code': get_column_value('column3'),
-            'bank_name': get_column_value('column12'),
-            'constant_symbol': get_column_value('column4'),
-            'variable_symbol': get_column_value('column5'),
-            'specific_symbol': get_column_value('column6'),
-            'user_identification': get_column_value('column7'),
-            'recipient_message': get_column_value('column16'),
-            'type': get_column_value('column8'),
-            'executor': get_column_value('column9'),
-            'specification': get_column_value('column18'),
-            'comment': get_column_value('column25'),
-            'bic': get_column_value('column26'),
-            'instruction_id': get_column_value('column17')
-        }
-        transactions.append(transaction_data)
-    
-    return transactions
-
-
-async def fetch_and_save_transactions(token: str, session: Session, progress_callback=None, api_url: str = None, back_date_days: int = 3):
+    Each run makes a single API request, as Fio allows one per 30 s.
+    Cursor changes are committed with the last batch of saved rows.
+    
+    Returns:
+        Tuple of (inserted, skipped)
+    """
+    cursor = session.scalars(
+        select(FetchCursor).where(FetchCursor.token_fingerprint == token_fingerprint(token))
+    ).first()
+    
+    if cursor is None:
+        async with fetch_statement(token, api_url, back_date_days) as statement:
+            return await save_statement(
+                session, statement, progress_callback,
+                finish=lambda db: _advance_cursor(db, token, statement.info, synced=False),
+            )
+    
+    if not cursor.synced:
+        await set_last_id(token, api_url, cursor.last_id)
+        cursor.synced = True
+        cursor.updated_at = datetime.now()
+        session.commit()
+        return 0, 0
+    
+    def finish(db: Session):
+        info = statement.info
+        pointer = info.get('idLastDownload')
+        if pointer is not None and pointer > cursor.last_id and pointer != info.get('idTo'):
+            logger.warning(
+                f"Fio download pointer ({pointer}) is ahead of the saved cursor ({cursor.last_id}); "
+                "the next fetch will use the date window to fill the gap"
+            )
+            db.delete(cursor)
+        else:
+            _advance_cursor(db, token, info, synced=True)
+    
+    try:
+        async with fetch_last_statement(token, api_url) as statement:
+            return await save_statement(session, statement, progress_callback, finish=finish)
+    except FioApiError as e:
+        if e.status == 422:
+            # History since the pointer is too long for Fio; start over with the window
+            session.delete(cursor)
+            session.commit()
+        raise
+
+
+def transaction_row(tr_data: dict) -> dict:
+    """Add the normalized symbol columns to a parsed transaction (see parse_transaction())."""
+    return {
+        **tr_data,
+        **symbol_norms(tr_data.get('variable_symbol'), tr_data.get('specific_symbol'), tr_data.get('constant_symbol')),
+    }
+
+
+def _insert_transactions(session: Session, transactions: List[dict], progress_callback=None,
+                         chunk_size: int = INSERT_CHUNK_SIZE) -> List[int]:
+    """Insert parsed transactions, skipping stored ones; return the ids of the inserted rows."""
+    total = len(transactions)
+    stmt = (
+        sqlite_insert(Transaction)
+        .on_conflict_do_nothing(index_elements=['transaction_id'])
+        .returning(Transaction.id)
+    )
+    conn = session.connection()
+    inserted_ids: List[int] = []
+    for start in range(0, total, chunk_size):
+        rows = [transaction_row(tr_data) for tr_data in transactions[start:start + chunk_size]]
+        inserted_ids.extend(conn.execute(stmt, rows).scalars())
+        if progress_callback:
+            progress_callback(min(start + chunk_size, total), total, "Saving...")
+    return inserted_ids
+
+
+def save_transactions(session: Session, transactions: List[dict], progress_callback=None,
+                      chunk_size: int = INSERT_CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Insert parsed transactions, skipping those already stored.
+    
+    Rows are inserted in chunks with INSERT ... ON CONFLICT DO NOTHING on the
+    unique transaction_id, so duplicates (already stored or repeated within
+    the batch) are skipped by the database instead of being looked up one by
+    one. Nothing is committed.
+    
+    Returns:
+        Tuple of (inserted, skipped)
+    """
+    inserted = len(_insert_transactions(session, transactions, progress_callback, chunk_size))
+    return inserted, len(transactions) - inserted
+
+
+def store_transactions(session: Session, transactions: List[dict], progress_callback=None) -> Tuple[int, int]:
+    """
+    Save parsed transactions and update everything derived from them.
+    
+    Inserts the new rows (see save_transactions()), matches them and adds
+    them to the daily rollup and bumps the data version. Nothing is
+    committed.
+    
+    Returns:
+        Tuple of (inserted, skipped)
+    """
+    inserted_ids = _insert_transactions(session, transactions, progress_callback)
+    saved_count, skipped_count = len(inserted_ids), len(transactions) - len(inserted_ids)
+    logger.info(f"Inserted {saved_count} new transaction(s), skipped {skipped_count} already stored")
+    if saved_count:
+        # The insert holds SQLite's write lock until commit, so every row
+        # above the first inserted id is one of ours. (A max(id) read before
+        # the insert could be outdated by a concurrent delete or backfill.)
+        last_id = min(inserted_ids) - 1
+        match_new_transactions(session, last_id)
+        update_rollup(session, last_id)
+        bump_data_version(session)
+    return saved_count, skipped_count
+
+
+def commit_transactions(session: Session, transactions: List[dict], progress_callback=None,
+                        finish: Callable[[Session], None] = None) -> Tuple[int, int]:
+    """
+    store_transactions() and commit, rolling back on failure.
+    
+    finish, if given, is called with the session before committing, so its
+    changes (download cursor, backfill progress) land with the rows.
+    Runs on the database writer thread (see writer.py).
+    """
+    try:
+        result = store_transactions(session, transactions, progress_callback)
+        if finish is not None:
+            finish(session)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return result
+
+
+async def save_statement(session: Session, statement: AsyncIterable[dict], progress_callback=None,
+                         finish: Callable[[Session], None] = None,
+                         batch_size: int = INSERT_CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Save the transactions of a statement as they are read.
+    
+    Transactions are collected in batches of batch_size, and each batch is
+    saved and committed on the database writer thread (commit_transactions()),
+    so memory use does not grow with the size of the statement. finish is
+    applied with the last batch, after the statement has been read.
+    
+    Returns:
+        Tuple of (inserted, skipped)
+    """
+    inserted = skipped = 0
+    batch: List[dict] = []
+    async for transaction in statement:
+        batch.append(transaction)
+        if len(batch) < batch_size:
+            continue
+        batch_inserted, batch_skipped = await db_writer.run(commit_transactions, session, batch)
+        inserted, skipped = inserted + batch_inserted, skipped + batch_skipped
+        batch = []
+        if progress_callback:
+            progress_callback(inserted + skipped, 0, f"Saving... {inserted + skipped} transactions so far")
+    batch_inserted, batch_skipped = await db_writer.run(commit_transactions, session, batch, None, finish)
+    return inserted + batch_inserted, skipped + batch_skipped
+
+
+async def fetch_and_save_transactions(token: str, session: Session, progress_callback=None, api_url: str = None, back_date_days: int = 3, fetch_mode: str = 'window'):
     if not token:
         logger.warning("No Fio token provided. Using example data from tr.json.")
         if progress_callback:
@@ -182,88 +548,44 @@ async def fetch_and_save_transactions(token: str, session: Session, progress_cal
             if progress_callback:
                 progress_callback(0, 0, f"Error loading example data: {str(e)}")
             raise e
-    else:
         if progress_callback:
-            progress_callback(0, 0, f"Connecting to Fio bank API at {api_url}...")
+            progress_callback(0, len(transactions), f"📋 Loaded {len(transactions)} example transactions. Saving...")
+    elif progress_callback:
+        progress_callback(0, 0, f"Connecting to Fio bank API at {api_url}...")
 
-        try:
-            # Fetch transactions using direct REST API call
+    try:
+        # Transactions are saved while the statement downloads; the
+        # synchronous database work runs on the writer thread
+        if not token:
+            async with ParsedStatement(transactions) as statement:
+                saved_count, skipped_count = await save_statement(session, statement, progress_callback)
+        elif not api_url:
             # api_url must be provided by the caller (from config)
-            if not api_url:
-                raise ValueError("api_url is required when token is provided")
-            transactions = await fetch_transactions_from_fio(token, api_url, back_date_days)
-        except Exception as e:
+            raise ValueError("api_url is required when token is provided")
+        elif fetch_mode == 'incremental':
+            saved_count, skipped_count = await fetch_incremental(token, api_url, back_date_days, session, progress_callback)
+        else:
+            async with fetch_statement(token, api_url, back_date_days) as statement:
+                saved_count, skipped_count = await save_statement(session, statement, progress_callback)
+    except IntegrityError:
+        logger.error("Integrity error while saving transactions.")
+        if progress_callback:
+            progress_callback(0, 0, "Error saving to database.")
+        raise
+    except Exception as e:
+        if token:
             # Mask token in error message before logging
             error_str = mask_token(str(e), token)
             logger.error(f"Error fetching transactions from Fio: {error_str}")
-            # Don't send progress_callback here - let the exception propagate
-            # to services.py where it will be properly formatted and sent via websocket
-            raise e
+        # Don't send progress_callback here - let the exception propagate
+        # to services.py where it will be properly formatted and sent via websocket
+        raise
 
-    total = len(transactions)
+    total = saved_count + skipped_count
     if progress_callback:
         if not token:
-            progress_callback(0, total, f"📋 Loaded {total} example transactions. Saving...")
+            progress_callback(total, total, f"✅ Done. Saved {saved_count} new example transactions.")
         else:
-            progress_callback(0, total, f"Fetched {total} transactions. Saving...")
-
-    saved_count = 0
-    for i, tr_data in enumerate(transactions):
-        # Map fiobank data to our model
-        
-        # Helper to safely get value
-        def get_val(key):
-            return tr_data.get(key)
-
-        transaction_id = str(get_val('transaction_id'))
-        
-        # check if exists
-        if session.query(Transaction).filter_by(transaction_id=transaction_id).first():
-            if progress_callback and i % 10 == 0: # Update every 10 items to avoid too much noise
-                 progress_callback(i + 1, total, "Processing...")
-            continue
-
-        new_tr = Transaction(
-            transaction_id=transaction_id,
-            date=get_val('date'),
-            amount=get_val('amount'),
-            currency=get_val('currency'),
-            counter_account=get_val('account_number'),
-            counter_account_name=get_val('account_name'),
-            bank_code=get_val('bank_code'),
-            bank_name=get_val('bank_name'),
-            constant_symbol=get_val('constant_symbol'),
-            variable_symbol=get_val('variable_symbol'),
-            specific_symbol=get_val('specific_symbol'),
-            user_identification=get_val('user_identification'),
-            message_for_recipient=get_val('recipient_message'),
-            type=get_val('type'),
-            executor=get_val('executor'),
-            specification=get_val('specification'),
-            comment=get_val('comment'),
-            bic=get_val('bic'),
-            instruction_id=str(get_val('instruction_id')) if get_val('instruction_id') else None,
-            payer_reference=None
-        )
-        
-        session.add(new_tr)
-        saved_count += 1
-        
-        if progress_callback and i % 5 == 0:
-             progress_callback(i + 1, total, "Saving...")
-    
-    try:
-        session.commit()
-        if progress_callback:
-            if not token:
-                progress_callback(total, total, f"✅ Done. Saved {saved_count} new example transactions.")
-            else:
-                progress_callback(total, total, f"Done. Saved {saved_count} new transactions.")
-    except IntegrityError:
-        session.rollback()
-        logger.error("Integrity error during commit.")
-        if progress_callback:
-            progress_callback(total, total, "Error saving to database.")
-        raise
+            progress_callback(total, total, f"Done. Saved {saved_count} new transactions ({skipped_count} already stored).")
 
     return saved_count
@@ -1,22 +1,11 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
 from .api import router
+from .middleware import NoCacheMiddleware, CompressionMiddleware
 from .config import get_config
 from .database import get_engine, init_db
 import os
 
-class NoCacheMiddleware(BaseHTTPMiddleware):
-    """Disable caching for API responses to prevent browser inconsistencies."""
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        # Add no-cache headers for API endpoints
-        if request.url.path.startswith("/api/"):
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-        return response
-
 def create_app():
     config = get_config()
     
@@ -29,6 +18,10 @@ def create_app():
     # Add no-cache middleware for API responses
     app.add_middleware(NoCacheMiddleware)
     
+    # Compress large responses (negative size disables)
+    if config.compress_min_size >= 0:
+        app.add_middleware(CompressionMiddleware, minimum_size=config.compress_min_size)
+    
     app.include_router(router, prefix="/api/v1")
     
     # Mount static files
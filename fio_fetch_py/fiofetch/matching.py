@@ -0,0 +1,281 @@
+"""
+Matching engine pairing bank transactions with uploaded matching data.
+
+A transaction matches a matching data entry when both their Variable Symbol
+(VS) and Specific Symbol (SS) are equal. If the entry also carries a Constant
+Symbol (KS), the transaction's KS must be equal as well; otherwise KS is
+ignored. Entries or transactions missing VS or SS never match.
+
+Both tables persist normalized symbols (vs_norm, ss_norm, ks_norm) backed by
+a composite index, so matching normally runs as a single join inside SQLite
+(see matched_pairs_select()). The resulting pairs are persisted in the
+transaction_match table: new transactions are matched incrementally on ingest
+and a matching data upload triggers one bulk rematch. The in-memory engine (build_index() and
+iter_matches()) indexes the entries once by (VS, SS) and looks each
+transaction up in that index, so it runs in O(N + M) as well. For very large
+reconciliations it can be sharded by VS across a process pool
+(match_pairs_parallel()).
+"""
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import select, update, insert, delete, exists, and_, or_, bindparam
+from sqlalchemy.engine import Engine
+from .models import Transaction, MatchingData, TransactionMatch
+
+# Values that are treated as "no symbol" (compared case-insensitively)
+EMPTY_SYMBOLS = frozenset(('', '-', 'null', 'undefined', 'n/a'))
+
+# (id, variable_symbol, specific_symbol, constant_symbol)
+SymbolRow = Tuple[int, Optional[str], Optional[str], Optional[str]]
+
+# (VS, SS) -> {KS or '' for "any KS": [entry ids]}
+MatchIndex = Dict[Tuple[str, str], Dict[str, List[int]]]
+
+
+def normalize_symbol(value) -> str:
+    """
+    Normalize a payment symbol for comparison.
+
+    Strips whitespace and treats None, '', '-', 'null', 'undefined' and 'n/a'
+    as empty.
+
+    Returns:
+        The stripped symbol, or '' if the value counts as empty
+    """
+    if value is None:
+        return ''
+    s = str(value).strip()
+    if s.lower() in EMPTY_SYMBOLS:
+        return ''
+    return s
+
+
+def symbol_norms(variable_symbol, specific_symbol, constant_symbol) -> Dict[str, Optional[str]]:
+    """
+    Compute the persisted normalized symbol columns for a row.
+
+    Empty symbols are stored as NULL so they never take part in SQL joins.
+    """
+    return {
+        'vs_norm': normalize_symbol(variable_symbol) or None,
+        'ss_norm': normalize_symbol(specific_symbol) or None,
+        'ks_norm': normalize_symbol(constant_symbol) or None,
+    }
+
+
+def build_index(entries: Iterable[SymbolRow]) -> MatchIndex:
+    """
+    Index matching data entries by their normalized (VS, SS) pair.
+
+    Entries without both VS and SS are skipped, as they can never match.
+    """
+    index: MatchIndex = {}
+    for entry_id, vs, ss, ks in entries:
+        vs = normalize_symbol(vs)
+        ss = normalize_symbol(ss)
+        if not vs or not ss:
+            continue
+        by_ks = index.setdefault((vs, ss), {})
+        by_ks.setdefault(normalize_symbol(ks), []).append(entry_id)
+    return index
+
+
+def iter_matches(index: MatchIndex, transactions: Iterable[SymbolRow]) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (transaction id, entry id) pairs for every match.
+
+    Args:
+        index: Index built by build_index()
+        transactions: Transaction symbol rows
+    """
+    for tx_id, vs, ss, ks in transactions:
+        vs = normalize_symbol(vs)
+        ss = normalize_symbol(ss)
+        if not vs or not ss:
+            continue
+        by_ks = index.get((vs, ss))
+        if by_ks is None:
+            continue
+        # Entries without KS match any KS
+        for entry_id in by_ks.get('', ()):
+            yield tx_id, entry_id
+        ks = normalize_symbol(ks)
+        if ks:
+            for entry_id in by_ks.get(ks, ()):
+                yield tx_id, entry_id
+
+
+def match_transaction_ids(entries: Iterable[SymbolRow], transactions: Iterable[SymbolRow]) -> Set[int]:
+    """
+    Return the IDs of transactions matching at least one entry.
+
+    Args:
+        entries: Matching data symbol rows
+        transactions: Transaction symbol rows
+    """
+    index = build_index(entries)
+    if not index:
+        return set()
+    return {tx_id for tx_id, _ in iter_matches(index, transactions)}
+
+
+def _match_shard(shard: Tuple[List[SymbolRow], List[SymbolRow]]) -> List[Tuple[int, int]]:
+    """Match one shard in a worker process."""
+    entries, transactions = shard
+    return list(iter_matches(build_index(entries), transactions))
+
+
+def match_pairs_parallel(entries: Sequence[SymbolRow], transactions: Sequence[SymbolRow], workers: int) -> List[Tuple[int, int]]:
+    """
+    Return (transaction id, entry id) pairs, matching shards in parallel.
+
+    Both sides are partitioned by a hash of the normalized VS, so rows that
+    can match always land in the same shard. Each shard is matched in a
+    ProcessPoolExecutor worker, which only receives plain symbol tuples.
+    Workers are spawned rather than forked: this runs inside a request
+    handler thread while other threads (the database writer, the server's
+    thread pool) hold locks and open SQLite connections.
+
+    Args:
+        entries: Matching data symbol rows
+        transactions: Transaction symbol rows
+        workers: Number of worker processes (1 or less matches in-process)
+    """
+    if workers <= 1:
+        return list(iter_matches(build_index(entries), transactions))
+
+    entry_shards: List[List[SymbolRow]] = [[] for _ in range(workers)]
+    tx_shards: List[List[SymbolRow]] = [[] for _ in range(workers)]
+    for rows, shards in ((entries, entry_shards), (transactions, tx_shards)):
+        for row in rows:
+            vs = normalize_symbol(row[1])
+            if vs:
+                shards[zlib.crc32(vs.encode()) % workers].append(row)
+
+    # Shards without entries can't produce matches
+    work = [(e, t) for e, t in zip(entry_shards, tx_shards) if e and t]
+    if not work:
+        return []
+
+    pairs: List[Tuple[int, int]] = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(work)), mp_context=multiprocessing.get_context('spawn')) as pool:
+        for shard_pairs in pool.map(_match_shard, work):
+            pairs.extend(shard_pairs)
+    return pairs
+
+
+def load_symbol_rows(db, model) -> List[SymbolRow]:
+    """Load compact (id, VS, SS, KS) tuples of normalized symbols for a model."""
+    stmt = select(model.id, model.vs_norm, model.ss_norm, model.ks_norm).where(model.vs_norm.is_not(None))
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def matched_pairs_select():
+    """
+    Build a SELECT of (transaction id, matching data id) pairs.
+
+    Runs entirely in SQLite as one join over the normalized symbol columns.
+    """
+    return select(Transaction.id, MatchingData.id.label('matching_data_id')).join(
+        MatchingData,
+        and_(
+            MatchingData.vs_norm == Transaction.vs_norm,
+            MatchingData.ss_norm == Transaction.ss_norm,
+            or_(MatchingData.ks_norm.is_(None), MatchingData.ks_norm == Transaction.ks_norm),
+        ),
+    )
+
+
+def is_matched():
+    """
+    Correlated EXISTS clause that is true for matched transactions.
+
+    Use ~is_matched() to hide matched transactions as an anti-join inside
+    SQLite instead of binding every matched id as a parameter.
+    """
+    return exists().where(TransactionMatch.tx_id == Transaction.id)
+
+
+def rematch_all(db, workers: int = 1, batch_size: int = 5000):
+    """
+    Recompute the whole transaction_match table.
+
+    With a single worker this is one INSERT ... SELECT inside SQLite. With
+    more workers the pairs are computed by match_pairs_parallel() and
+    inserted in batches.
+
+    Args:
+        db: Session or Connection to run the statements on
+        workers: Number of matching worker processes
+        batch_size: Rows per INSERT when using workers
+    """
+    db.execute(delete(TransactionMatch))
+    if workers <= 1:
+        db.execute(
+            insert(TransactionMatch).from_select(['tx_id', 'matching_data_id'], matched_pairs_select())
+        )
+        return
+
+    pairs = match_pairs_parallel(
+        load_symbol_rows(db, MatchingData), load_symbol_rows(db, Transaction), workers
+    )
+    for start in range(0, len(pairs), batch_size):
+        db.execute(
+            insert(TransactionMatch),
+            [{'tx_id': tx_id, 'matching_data_id': entry_id} for tx_id, entry_id in pairs[start:start + batch_size]],
+        )
+
+
+def match_new_transactions(db, after_id: int):
+    """
+    Match transactions inserted after after_id against the current matching set.
+
+    Only the new transactions are checked; existing matches are kept.
+
+    Args:
+        db: Session or Connection to run the statement on
+        after_id: Transaction id below the inserted rows (all rows above it
+            must be new, so read it under the insert's write lock)
+    """
+    db.execute(
+        insert(TransactionMatch).from_select(
+            ['tx_id', 'matching_data_id'],
+            matched_pairs_select().where(Transaction.id > after_id),
+        )
+    )
+
+
+def backfill_symbol_norms(engine: Engine, batch_size: int = 5000):
+    """
+    Fill the normalized symbol columns of existing rows.
+
+    Used when upgrading a database created before the columns existed.
+    """
+    for model in (Transaction, MatchingData):
+        table = model.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('row_id'))
+            .values(
+                vs_norm=bindparam('new_vs_norm'),
+                ss_norm=bindparam('new_ss_norm'),
+                ks_norm=bindparam('new_ks_norm'),
+            )
+        )
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.variable_symbol, table.c.specific_symbol, table.c.constant_symbol)
+            ).all()
+            for start in range(0, len(rows), batch_size):
+                params = []
+                for row_id, vs, ss, ks in rows[start:start + batch_size]:
+                    norms = symbol_norms(vs, ss, ks)
+                    params.append({
+                        'row_id': row_id,
+                        'new_vs_norm': norms['vs_norm'],
+                        'new_ss_norm': norms['ss_norm'],
+                        'new_ks_norm': norms['ks_norm'],
+                    })
+                conn.execute(stmt, params)
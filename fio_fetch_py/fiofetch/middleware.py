@@ -0,0 +1,147 @@
+"""
+Pure ASGI middleware for the API.
+
+These wrap the ASGI send callable directly instead of using Starlette's
+BaseHTTPMiddleware, so no extra task or memory stream is created per request
+and streaming responses (e.g. /transactions/export) pass through unbuffered.
+"""
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/',
+)
+
+
+class NoCacheMiddleware:
+    """
+    Disable caching for API responses to prevent browser inconsistencies.
+
+    Responses with an ETag (see api.check_etag) get "no-cache" instead, so the
+    browser may keep them but has to revalidate each time.
+    """
+
+    def __init__(self, app, path_prefix: str = '/api/'):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(raw=message['headers'])
+                if 'etag' in headers:
+                    headers['Cache-Control'] = 'no-cache'
+                else:
+                    headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+                headers['Pragma'] = 'no-cache'
+                headers['Expires'] = '0'
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Encodings listed in an Accept-Encoding header (ignoring those with q=0)."""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if name and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name.lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compress complete text and JSON responses of at least minimum_size bytes.
+
+    Brotli is used when the client accepts it and the optional brotli package
+    is installed, gzip otherwise. Streaming responses, responses that already
+    have a Content-Encoding and small bodies are sent unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    def _should_compress(self, start: dict, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start['status'] in (204, 304):
+            return False
+        headers = Headers(raw=start['headers'])
+        if 'content-encoding' in headers:
+            return False
+        content_type = headers.get('content-type', '')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = self.choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # The start message is held until the first body message shows
+        # whether the response is complete and large enough
+        pending_start = None
+
+        async def send_compressed(message):
+            nonlocal pending_start
+            if message['type'] == 'http.response.start':
+                pending_start = message
+                return
+            if pending_start is None:
+                await send(message)
+                return
+
+            start, pending_start = pending_start, None
+            body = message.get('body', b'')
+            if (
+                message['type'] != 'http.response.body'
+                or message.get('more_body', False)
+                or not self._should_compress(start, body)
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self.compress(encoding, body)
+            headers = MutableHeaders(raw=start['headers'])
+            headers['Content-Encoding'] = encoding
+            headers['Content-Length'] = str(len(compressed))
+            headers.add_vary_header('Accept-Encoding')
+            await send(start)
+            await send({'type': 'http.response.body', 'body': compressed})
+
+        await self.app(scope, receive, send_compressed)
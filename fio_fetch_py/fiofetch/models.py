@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, Index, ForeignKey
 from .database import Base
 
 class Transaction(Base):
@@ -25,6 +25,18 @@ class Transaction(Base):
     bic = Column(String, nullable=True) # Column26 BIC
     instruction_id = Column(String, nullable=True) # Column17 ID pokynu
     payer_reference = Column(String, nullable=True) # Column27 Reference plátce
+    # Normalized symbols used for matching (NULL when the symbol is empty)
+    vs_norm = Column(String, nullable=True)
+    ss_norm = Column(String, nullable=True)
+    ks_norm = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_transactions_symbols_norm", "vs_norm", "ss_norm", "ks_norm"),
+        # Keyset pagination in (date desc, id desc) order
+        Index("ix_transactions_date_id", "date", "id"),
+        # Currency and amount range filters
+        Index("ix_transactions_currency_amount", "currency", "amount"),
+    )
 
 class MatchingData(Base):
     __tablename__ = "matching_data"
@@ -35,3 +47,56 @@ class MatchingData(Base):
     constant_symbol = Column(String, nullable=True, index=True)
     row_data = Column(Text, nullable=True)  # Store full row data as JSON string for reference
     created_at = Column(Date, nullable=False)  # When this matching entry was created
+    # Normalized symbols used for matching (NULL when the symbol is empty)
+    vs_norm = Column(String, nullable=True)
+    ss_norm = Column(String, nullable=True)
+    ks_norm = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_matching_data_symbols_norm", "vs_norm", "ss_norm", "ks_norm"),
+    )
+
+class TransactionMatch(Base):
+    """Persisted match between a transaction and a matching data entry."""
+    __tablename__ = "transaction_match"
+
+    tx_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), primary_key=True)
+    matching_data_id = Column(Integer, ForeignKey("matching_data.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class DailyRollup(Base):
+    """Per-day transaction totals, maintained on ingest for the aggregate endpoint."""
+    __tablename__ = "daily_rollup"
+
+    day = Column(Date, primary_key=True)
+    currency = Column(String, primary_key=True)
+    counter_account = Column(String, primary_key=True)  # '' when the transaction has none
+    direction = Column(String, primary_key=True)  # incoming / outgoing / '' for zero amounts
+    amount_sum = Column(Float, nullable=False)
+    tx_count = Column(Integer, nullable=False)
+
+class FetchCursor(Base):
+    """Download position of the incremental fetch (fetch mode "incremental"), per account."""
+    __tablename__ = "fetch_cursor"
+
+    account_id = Column(String, primary_key=True)  # info.accountId
+    token_fingerprint = Column(String, nullable=False, index=True)  # Which token the cursor belongs to
+    last_id = Column(Integer, nullable=False)  # Newest movement id saved (info.idTo)
+    synced = Column(Boolean, nullable=False, default=False)  # Fio's own pointer was moved to last_id
+    updated_at = Column(DateTime, nullable=False)
+
+class BackfillProgress(Base):
+    """Progress of a `fiofetch backfill` run over a date range."""
+    __tablename__ = "backfill_progress"
+
+    date_from = Column(Date, primary_key=True)
+    date_to = Column(Date, primary_key=True)
+    completed_to = Column(Date, nullable=True)  # Last day of the last saved chunk
+    updated_at = Column(DateTime, nullable=False)
+
+class DataVersion(Base):
+    """Single-row version of the data, bumped in every write that changes API results."""
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)  # Always 1
+    token = Column(String, nullable=False)  # Random per database, so a recreated database starts fresh
+    version = Column(Integer, nullable=False, default=0)
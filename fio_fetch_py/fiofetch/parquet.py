@@ -0,0 +1,229 @@
+"""
+Columnar (Parquet) snapshot export for analytics.
+
+Writes typed Parquet files that pandas, DuckDB or Polars can read directly:
+
+    <export_dir>/transactions/month=YYYY-MM/part-<first id>-<last id>.parquet
+    <export_dir>/matching_data.parquet
+    <export_dir>/_state.json
+
+Transactions are appended incrementally: only rows with an id above the last
+exported id are written, partitioned by month. SQLite reuses ids after the
+transactions are deleted, so the state also records how many rows were
+exported and which transaction holds the last exported id; when either no
+longer matches the database, the export is rewritten from scratch. Matching data is replaced on
+every upload, so it is always written as a full snapshot. Everything is read
+inside a single read transaction, so the export is a consistent snapshot even
+while the server is writing.
+
+Requires the optional pyarrow dependency (pip install 'fiofetch[parquet]').
+"""
+import json
+import logging
+import os
+import shutil
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlalchemy import select, func
+from .models import Transaction, MatchingData
+from .export import EXPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_state.json'
+BATCH_SIZE = 10000
+
+# Low-cardinality columns stored dictionary-encoded
+DICTIONARY_COLUMNS = {
+    'currency', 'bank_code', 'type', 'constant_symbol', 'variable_symbol', 'specific_symbol',
+}
+
+_CENT = Decimal('0.01')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires pyarrow. Install it with: pip install 'fiofetch[parquet]'") from e
+    return pyarrow
+
+
+def _string_type(pa, name: str):
+    return pa.dictionary(pa.int32(), pa.string()) if name in DICTIONARY_COLUMNS else pa.string()
+
+
+def transactions_schema(pa):
+    fields = []
+    for name in EXPORT_COLUMNS:
+        if name == 'id':
+            fields.append(pa.field(name, pa.int64(), nullable=False))
+        elif name == 'date':
+            fields.append(pa.field(name, pa.date32(), nullable=False))
+        elif name == 'amount':
+            fields.append(pa.field(name, pa.decimal128(18, 2), nullable=False))
+        else:
+            fields.append(pa.field(name, _string_type(pa, name)))
+    return pa.schema(fields)
+
+
+def matching_data_schema(pa):
+    return pa.schema([
+        pa.field('id', pa.int64(), nullable=False),
+        pa.field('variable_symbol', _string_type(pa, 'variable_symbol')),
+        pa.field('specific_symbol', _string_type(pa, 'specific_symbol')),
+        pa.field('constant_symbol', _string_type(pa, 'constant_symbol')),
+        pa.field('row_data', pa.string()),
+        pa.field('created_at', pa.date32(), nullable=False),
+    ])
+
+
+def _to_decimal(value: float) -> Decimal:
+    return Decimal(repr(value)).quantize(_CENT)
+
+
+def _read_state(export_dir: str) -> dict:
+    path = os.path.join(export_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_state(export_dir: str, state: dict):
+    path = os.path.join(export_dir, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _export_is_current(conn, state: dict) -> bool:
+    """Check that the rows exported so far are still the ones in the database."""
+    last_id = state.get('last_transaction_id', 0)
+    if not last_id:
+        return True
+    last_row = conn.execute(select(Transaction.transaction_id).where(Transaction.id == last_id)).scalar()
+    if last_row is None:
+        return False
+    if 'exported_count' not in state:
+        # State written before the reset marker existed
+        return True
+    exported = conn.execute(select(func.count()).where(Transaction.id <= last_id)).scalar()
+    return last_row == state.get('last_transaction_ref') and exported == state['exported_count']
+
+
+class _MonthWriter:
+    """Writes one month's rows as a single Parquet file, one row group per batch."""
+
+    def __init__(self, pa, export_dir: str, month: str, schema):
+        self.pa = pa
+        self.dir = os.path.join(export_dir, 'transactions', f'month={month}')
+        os.makedirs(self.dir, exist_ok=True)
+        self.tmp_path = os.path.join(self.dir, '.part.tmp')
+        self.writer = pa.parquet.ParquetWriter(self.tmp_path, schema)
+        self.schema = schema
+        self.first_id: Optional[int] = None
+        self.last_id: Optional[int] = None
+
+    def write(self, columns: Dict[str, list]):
+        ids = columns['id']
+        self.first_id = min(ids) if self.first_id is None else min(self.first_id, min(ids))
+        self.last_id = max(ids) if self.last_id is None else max(self.last_id, max(ids))
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self) -> str:
+        self.writer.close()
+        path = os.path.join(self.dir, f'part-{self.first_id:012d}-{self.last_id:012d}.parquet')
+        os.replace(self.tmp_path, path)
+        return path
+
+
+def export_parquet(engine, export_dir: str) -> dict:
+    """
+    Export transactions (incrementally) and matching data to Parquet.
+
+    Args:
+        engine: SQLAlchemy engine of the fiofetch database
+        export_dir: Directory to write into (created if missing)
+
+    Returns:
+        Summary with the number of rows and the files written
+    """
+    pa = _pyarrow()
+    export_dir = os.path.expanduser(export_dir)
+    os.makedirs(export_dir, exist_ok=True)
+    state = _read_state(export_dir)
+    last_id = state.get('last_transaction_id', 0)
+    schema = transactions_schema(pa)
+    files: List[str] = []
+    written = 0
+
+    with engine.connect() as conn, conn.begin():
+        # pysqlite defers BEGIN until the first write; start the read
+        # transaction explicitly so all SELECTs see one WAL snapshot
+        conn.exec_driver_sql("BEGIN")
+        max_id = conn.execute(select(func.max(Transaction.id))).scalar() or 0
+        if not _export_is_current(conn, state):
+            # Transactions were deleted and ids restarted: export from scratch
+            logger.info("Transactions were reset, rewriting the Parquet export")
+            shutil.rmtree(os.path.join(export_dir, 'transactions'), ignore_errors=True)
+            last_id = 0
+            exported_count = 0
+        else:
+            exported_count = conn.execute(select(func.count()).where(Transaction.id <= last_id)).scalar()
+
+        # Ordered by date so only one month file is open at a time
+        stmt = (
+            select(*(getattr(Transaction, name) for name in EXPORT_COLUMNS))
+            .where(Transaction.id > last_id, Transaction.id <= max_id)
+            .order_by(Transaction.date, Transaction.id)
+        )
+        result = conn.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(stmt)
+        writer: Optional[_MonthWriter] = None
+        for batch in result.partitions():
+            by_month: Dict[str, Dict[str, list]] = {}
+            for row in batch:
+                month = row.date.strftime('%Y-%m')
+                columns = by_month.setdefault(month, {name: [] for name in EXPORT_COLUMNS})
+                for name, value in zip(EXPORT_COLUMNS, row):
+                    columns[name].append(_to_decimal(value) if name == 'amount' else value)
+            for month, columns in by_month.items():
+                if writer is None or writer.dir != os.path.join(export_dir, 'transactions', f'month={month}'):
+                    if writer is not None:
+                        files.append(writer.close())
+                    writer = _MonthWriter(pa, export_dir, month, schema)
+                writer.write(columns)
+                written += len(columns['id'])
+        if writer is not None:
+            files.append(writer.close())
+        last_ref = conn.execute(select(Transaction.transaction_id).where(Transaction.id == max_id)).scalar()
+
+        matching_rows = conn.execute(
+            select(MatchingData.id, MatchingData.variable_symbol, MatchingData.specific_symbol,
+                   MatchingData.constant_symbol, MatchingData.row_data, MatchingData.created_at)
+            .order_by(MatchingData.id)
+        ).all()
+
+    md_schema = matching_data_schema(pa)
+    md_columns = {field.name: [row[i] for row in matching_rows] for i, field in enumerate(md_schema)}
+    md_path = os.path.join(export_dir, 'matching_data.parquet')
+    pa.parquet.write_table(pa.table(md_columns, schema=md_schema), md_path + '.tmp')
+    os.replace(md_path + '.tmp', md_path)
+    files.append(md_path)
+
+    _write_state(export_dir, {
+        'last_transaction_id': max_id,
+        'last_transaction_ref': last_ref,
+        'exported_count': exported_count + written,
+    })
+    logger.info(f"Parquet export: {written} new transaction(s), {len(matching_rows)} matching data row(s)")
+
+    return {
+        'export_dir': export_dir,
+        'transactions_written': written,
+        'matching_data_rows': len(matching_rows),
+        'last_transaction_id': max_id,
+        'files': files,
+    }
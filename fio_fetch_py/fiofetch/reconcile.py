@@ -0,0 +1,178 @@
+"""
+Amount- and split-aware reconciliation of matching data against payments.
+
+Payments are aggregated per matching data entry with one grouped query over
+the transaction_match table. Each entry's total is then compared with the
+expected amount or split schedule stored in its row_data:
+
+- ``{"amount": 5000}`` - a single expected amount (optionally with "dueDate")
+- ``{"splits": [{"amount": 3000, "dueDate": "2025-07-01"}, ...]}`` - an
+  installment schedule, as generated by examples/mk.py
+"""
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import select, func
+from .models import Transaction, MatchingData, TransactionMatch
+
+# Amounts closer than this are considered equal
+AMOUNT_TOLERANCE = 0.005
+
+STATE_PAID = 'paid'
+STATE_PARTIAL = 'partial'
+STATE_OVERPAID = 'overpaid'
+STATE_OVERDUE = 'overdue'
+STATE_UNPAID = 'unpaid'
+STATE_UNKNOWN = 'unknown'
+
+STATES = (STATE_PAID, STATE_PARTIAL, STATE_OVERPAID, STATE_OVERDUE, STATE_UNPAID, STATE_UNKNOWN)
+
+# (amount, due date or None)
+Schedule = List[Tuple[float, Optional[date]]]
+
+
+def entry_totals_select():
+    """
+    Build a grouped SELECT of payment totals per matching data entry.
+
+    Columns: id, variable_symbol, specific_symbol, constant_symbol, row_data,
+    payment_count, paid_amount, last_payment_date. Entries without payments
+    are included with a zero count and amount.
+    """
+    return (
+        select(
+            MatchingData.id,
+            MatchingData.variable_symbol,
+            MatchingData.specific_symbol,
+            MatchingData.constant_symbol,
+            MatchingData.row_data,
+            func.count(Transaction.id).label('payment_count'),
+            func.coalesce(func.sum(Transaction.amount), 0.0).label('paid_amount'),
+            func.max(Transaction.date).label('last_payment_date'),
+        )
+        .select_from(MatchingData)
+        .outerjoin(TransactionMatch, TransactionMatch.matching_data_id == MatchingData.id)
+        .outerjoin(Transaction, Transaction.id == TransactionMatch.tx_id)
+        .group_by(MatchingData.id)
+    )
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse an amount from JSON or spreadsheet text ("3 000,50")."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).replace(' ', '').replace(' ', '').replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_due_date(value: Any) -> Optional[date]:
+    """Parse a YYYY-MM-DD due date, ignoring anything unparseable."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def expected_schedule(row_data: Optional[str], amount_field: str = 'amount') -> Schedule:
+    """
+    Extract the expected payment schedule from an entry's row_data JSON.
+
+    A "splits" list takes precedence over a single amount_field value.
+    Returns an empty schedule if nothing usable is found.
+    """
+    if not row_data:
+        return []
+    try:
+        data = json.loads(row_data)
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return []
+
+    splits = data.get('splits')
+    if isinstance(splits, str):
+        try:
+            splits = json.loads(splits)
+        except ValueError:
+            splits = None
+    if isinstance(splits, list):
+        schedule = []
+        for split in splits:
+            if not isinstance(split, dict):
+                continue
+            amount = parse_amount(split.get('amount'))
+            if amount is not None:
+                schedule.append((amount, parse_due_date(split.get('dueDate') or split.get('due_date'))))
+        if schedule:
+            return schedule
+
+    amount = parse_amount(data.get(amount_field))
+    if amount is None:
+        return []
+    return [(amount, parse_due_date(data.get('dueDate') or data.get('due_date')))]
+
+
+def classify(paid: float, schedule: Schedule, today: date) -> Tuple[str, Optional[float], Optional[float]]:
+    """
+    Classify an entry by comparing the paid total with its schedule.
+
+    Entries without an expected amount are unknown, whatever was paid.
+
+    Returns:
+        Tuple of (state, expected amount, amount due by today)
+    """
+    if not schedule:
+        return STATE_UNKNOWN, None, None
+
+    expected = sum(amount for amount, _ in schedule)
+    due = sum(amount for amount, due_date in schedule if due_date is not None and due_date < today)
+
+    if paid > expected + AMOUNT_TOLERANCE:
+        state = STATE_OVERPAID
+    elif paid >= expected - AMOUNT_TOLERANCE:
+        state = STATE_PAID
+    elif paid < due - AMOUNT_TOLERANCE:
+        state = STATE_OVERDUE
+    elif paid > AMOUNT_TOLERANCE:
+        state = STATE_PARTIAL
+    else:
+        state = STATE_UNPAID
+    return state, expected, due
+
+
+def reconcile(db, amount_field: str = 'amount', today: Optional[date] = None) -> List[dict]:
+    """
+    Reconcile every matching data entry against its matched payments.
+
+    Args:
+        db: Session or Connection
+        amount_field: row_data key holding a single expected amount
+        today: Reference date for overdue checks (defaults to today)
+
+    Returns:
+        One dict per entry with the aggregated payments and its state
+    """
+    today = today or date.today()
+    results = []
+    for row in db.execute(entry_totals_select().order_by(MatchingData.id)):
+        state, expected, due = classify(row.paid_amount, expected_schedule(row.row_data, amount_field), today)
+        results.append({
+            'id': row.id,
+            'variable_symbol': row.variable_symbol,
+            'specific_symbol': row.specific_symbol,
+            'constant_symbol': row.constant_symbol,
+            'expected_amount': expected,
+            'due_amount': due,
+            'paid_amount': row.paid_amount,
+            'payment_count': row.payment_count,
+            'last_payment_date': row.last_payment_date,
+            'state': state,
+        })
+    return results
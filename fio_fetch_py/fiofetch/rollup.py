@@ -0,0 +1,129 @@
+"""
+Daily rollup of transaction totals for the aggregate endpoint.
+
+daily_rollup keeps the sum and count of transactions per (day, currency,
+counter account, direction). Charts grouped by day, month, counter account
+or currency are answered from it instead of scanning transactions.
+Directions follow the transaction list filter: incoming is amount > 0,
+outgoing amount < 0; zero-amount movements have an empty direction and only
+count when no direction is requested. New
+transactions are added incrementally on ingest (update_rollup()), and the
+table is rebuilt when transactions are deleted (rebuild_rollup()).
+"""
+from typing import List
+from sqlalchemy import select, delete, func, case
+from sqlalchemy.dialects.sqlite import insert
+from .models import Transaction, DailyRollup
+
+DIRECTION_INCOMING = 'incoming'
+DIRECTION_OUTGOING = 'outgoing'
+DIRECTION_NONE = ''
+
+GROUP_BY = ('day', 'month', 'counter_account', 'currency')
+METRICS = ('sum', 'count')
+
+_KEY_COLUMNS = ['day', 'currency', 'counter_account', 'direction']
+
+
+def _rollup_select(after_id: int):
+    """Totals of the transactions with id > after_id, grouped by the rollup key."""
+    counter_account = func.coalesce(Transaction.counter_account, '')
+    direction = case(
+        (Transaction.amount > 0, DIRECTION_INCOMING),
+        (Transaction.amount < 0, DIRECTION_OUTGOING),
+        else_=DIRECTION_NONE,
+    )
+    return (
+        select(
+            Transaction.date,
+            Transaction.currency,
+            counter_account,
+            direction,
+            func.sum(Transaction.amount),
+            func.count(),
+        )
+        .where(Transaction.id > after_id)
+        .group_by(Transaction.date, Transaction.currency, counter_account, direction)
+    )
+
+
+def update_rollup(db, after_id: int):
+    """
+    Add transactions inserted after after_id to the rollup.
+
+    Args:
+        db: Session or Connection to run the statement on
+        after_id: Transaction id below the inserted rows (all rows above it
+            must be new, so read it under the insert's write lock)
+    """
+    stmt = insert(DailyRollup).from_select(_KEY_COLUMNS + ['amount_sum', 'tx_count'], _rollup_select(after_id))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=_KEY_COLUMNS,
+        set_={
+            'amount_sum': DailyRollup.amount_sum + stmt.excluded.amount_sum,
+            'tx_count': DailyRollup.tx_count + stmt.excluded.tx_count,
+        },
+    ))
+
+
+def rebuild_rollup(db):
+    """Recompute the whole rollup from the transactions table."""
+    db.execute(delete(DailyRollup))
+    update_rollup(db, 0)
+
+
+def rollup_outdated(db) -> bool:
+    """
+    True if zero-amount transactions are not in the rollup's empty direction.
+
+    Rollups built by older versions counted them as incoming.
+    """
+    zero_amounts = db.execute(select(Transaction.id).where(Transaction.amount == 0).limit(1)).first()
+    if zero_amounts is None:
+        return False
+    no_direction = db.execute(
+        select(DailyRollup.day).where(DailyRollup.direction == DIRECTION_NONE).limit(1)
+    ).first()
+    return no_direction is None
+
+
+def aggregate(db, group_by: str, metric: str, date_from=None, date_to=None,
+              currency=None, direction=None) -> List[dict]:
+    """
+    Aggregate transactions from the rollup.
+
+    Args:
+        db: Session or Connection
+        group_by: 'day', 'month', 'counter_account' or 'currency'
+        metric: 'sum' (of amounts) or 'count' (of transactions)
+        date_from, date_to: Optional inclusive date range
+        currency: Optional currency code
+        direction: Optional 'incoming' or 'outgoing'
+
+    Returns:
+        List of {"key": ..., "value": ...} ordered by key
+    """
+    if group_by == 'day':
+        key = func.strftime('%Y-%m-%d', DailyRollup.day)
+    elif group_by == 'month':
+        key = func.strftime('%Y-%m', DailyRollup.day)
+    else:
+        key = getattr(DailyRollup, group_by)
+    value = func.sum(DailyRollup.amount_sum if metric == 'sum' else DailyRollup.tx_count)
+
+    stmt = select(key.label('key'), value.label('value')).group_by(key).order_by(key)
+    if date_from is not None:
+        stmt = stmt.where(DailyRollup.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(DailyRollup.day <= date_to)
+    if currency:
+        stmt = stmt.where(DailyRollup.currency == currency.upper())
+    if direction:
+        stmt = stmt.where(DailyRollup.direction == direction)
+
+    rows = []
+    for row_key, row_value in db.execute(stmt):
+        if metric == 'sum':
+            row_value = round(row_value, 2)
+        rows.append({'key': row_key, 'value': row_value})
+    return rows
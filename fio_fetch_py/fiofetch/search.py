@@ -0,0 +1,103 @@
+"""
+Trigram full-text index for substring filters on transaction text columns.
+
+A plain ``ilike('%x%')`` can't use a B-tree index, so every substring filter
+scans the whole transactions table. The transactions_fts FTS5 table mirrors
+the filterable columns with the trigram tokenizer, which serves LIKE
+'%x%' patterns of three or more characters from the index. Triggers keep it
+in sync with inserts, updates and deletes on transactions.
+
+FTS5 with the trigram tokenizer needs SQLite 3.34+. If it isn't available the
+filters fall back to ilike() on the transactions table.
+"""
+import logging
+from typing import Dict
+from sqlalchemy import text, table, column
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'transactions_fts'
+
+# Transaction columns mirrored in the index
+FTS_COLUMNS = (
+    'variable_symbol',
+    'specific_symbol',
+    'constant_symbol',
+    'counter_account',
+    'counter_account_name',
+    'bank_code',
+    'bank_name',
+    'executor',
+    'transaction_id',
+)
+
+# Shorter patterns can't use the trigram index
+MIN_PATTERN_LENGTH = 3
+
+fts_table = table(FTS_TABLE, column('rowid'), *(column(name) for name in FTS_COLUMNS))
+
+# Database URL -> whether the index exists
+_available: Dict[str, bool] = {}
+
+
+def _trigger_sql():
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{name}' for name in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{name}' for name in FTS_COLUMNS)
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON transactions BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON transactions BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def ensure_fts(engine) -> bool:
+    """
+    Create the index and its sync triggers if missing, backfilling existing rows.
+
+    Returns:
+        True if the index is available
+    """
+    url = str(engine.url)
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first() is not None
+        if not exists:
+            try:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({', '.join(FTS_COLUMNS)}, "
+                    f"content='transactions', content_rowid='id', tokenize='trigram')"
+                ))
+            except OperationalError as e:
+                logger.warning(f"Full-text index unavailable, substring filters will scan the table: {e}")
+                _available[url] = False
+                return False
+        for sql in _trigger_sql():
+            conn.execute(text(sql))
+        if not exists:
+            rebuild_fts(conn)
+    _available[url] = True
+    return True
+
+
+def rebuild_fts(conn):
+    """Rebuild the whole index from the transactions table (backfill)."""
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def fts_available(db) -> bool:
+    """Whether the index exists for the database behind a Session or Connection."""
+    bind = db.get_bind() if hasattr(db, 'get_bind') else db.engine
+    url = str(bind.url)
+    if url not in _available:
+        with bind.connect() as conn:
+            _available[url] = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first() is not None
+    return _available[url]
@@ -98,7 +98,8 @@ class FetchService:
                     db, 
                     progress_callback,
                     api_url=config.fio_api_url,
-                    back_date_days=config.back_date_days
+                    back_date_days=config.back_date_days,
+                    fetch_mode=config.fetch_mode
                 )
                 
                 await self.manager.broadcast({"status": "completed", "new_transactions": count, "message": f"✅ Fetch completed! Saved {count} new transaction(s)."})
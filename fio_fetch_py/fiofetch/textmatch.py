@@ -0,0 +1,166 @@
+"""
+Fallback matching of payment symbols typed into free-text fields.
+
+Many payers leave VS or SS empty and write the symbols into the message or
+comment instead. All symbols of the matching set are compiled into a single
+Aho-Corasick automaton, so every unmatched transaction's text is scanned in
+one linear pass regardless of how many symbols there are.
+"""
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import select
+from .models import Transaction, MatchingData
+from .matching import is_matched
+
+# Transaction columns scanned for symbols
+TEXT_FIELDS = ('message_for_recipient', 'comment', 'user_identification', 'specification')
+
+CONFIDENCE_HIGH = 'high'
+CONFIDENCE_LOW = 'low'
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher (Aho-Corasick automaton)."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        if pattern not in self._out[state]:
+            self._out[state] = self._out[state] + (pattern,)
+
+    def _build(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start index, pattern) for every occurrence in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in out[state]:
+                yield index - len(pattern) + 1, pattern
+
+
+def _continues(a: str, b: str) -> bool:
+    """True if b continues the same token as a (digit after digit, letter after letter)."""
+    return (a.isdigit() and b.isdigit()) or (a.isalpha() and b.isalpha())
+
+
+def find_symbols(automaton: AhoCorasick, text: Optional[str]) -> Set[str]:
+    """
+    Return the symbols occurring in text as whole tokens.
+
+    An occurrence inside a longer number or word (e.g. "123" in "91234") is
+    ignored, while a prefix like "VS123" still counts.
+    """
+    found = set()
+    if not text:
+        return found
+    for start, pattern in automaton.find(text):
+        end = start + len(pattern)
+        if start > 0 and _continues(text[start - 1], pattern[0]):
+            continue
+        if end < len(text) and _continues(pattern[-1], text[end]):
+            continue
+        found.add(pattern)
+    return found
+
+
+def find_candidates(db) -> List[dict]:
+    """
+    Find candidate matches for unmatched transactions in their text fields.
+
+    A candidate is reported when the entry's VS appears in the text (or the
+    VS field). Confidence is "high" when the SS (and KS, if the entry has one)
+    is found as well, otherwise "low".
+
+    Returns:
+        List of dicts with tx_id, transaction_id, matching_data_id,
+        confidence and the fields the symbols were found in
+    """
+    # VS -> [(entry id, SS, KS)]
+    entries_by_vs: Dict[str, List[Tuple[int, str, Optional[str]]]] = {}
+    symbols = set()
+    entry_rows = db.execute(
+        select(MatchingData.id, MatchingData.vs_norm, MatchingData.ss_norm, MatchingData.ks_norm)
+        .where(MatchingData.vs_norm.is_not(None), MatchingData.ss_norm.is_not(None))
+    )
+    for entry_id, vs, ss, ks in entry_rows:
+        entries_by_vs.setdefault(vs, []).append((entry_id, ss, ks))
+        symbols.update((vs, ss))
+        if ks:
+            symbols.add(ks)
+    if not entries_by_vs:
+        return []
+
+    automaton = AhoCorasick(symbols)
+    text_columns = [getattr(Transaction, field) for field in TEXT_FIELDS]
+    tx_rows = db.execute(
+        select(Transaction.id, Transaction.transaction_id, Transaction.vs_norm, Transaction.ss_norm,
+               Transaction.ks_norm, *text_columns)
+        .where(~is_matched())
+        .order_by(Transaction.id)
+        .execution_options(yield_per=1000)
+    )
+
+    candidates = []
+    for row in tx_rows:
+        tx_id, transaction_id, tx_vs, tx_ss, tx_ks = row[:5]
+        found_in: Dict[str, List[str]] = {}
+        for field, text in zip(TEXT_FIELDS, row[5:]):
+            for symbol in find_symbols(automaton, text):
+                found_in.setdefault(symbol, []).append(field)
+        if not found_in:
+            continue
+
+        present = set(found_in)
+        for value in (tx_vs, tx_ss, tx_ks):
+            if value:
+                present.add(value)
+
+        for vs in present & entries_by_vs.keys():
+            for entry_id, ss, ks in entries_by_vs[vs]:
+                # At least one of the symbols has to come from free text
+                if vs not in found_in and ss not in found_in:
+                    continue
+                ks_ok = not ks or ks in present
+                confidence = CONFIDENCE_HIGH if ss in present and ks_ok else CONFIDENCE_LOW
+                fields = sorted({f for symbol in (vs, ss, ks) if symbol in found_in for f in found_in[symbol]})
+                candidates.append({
+                    'tx_id': tx_id,
+                    'transaction_id': transaction_id,
+                    'matching_data_id': entry_id,
+                    'confidence': confidence,
+                    'fields': fields,
+                })
+    return candidates
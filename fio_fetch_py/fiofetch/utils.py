@@ -1,7 +1,11 @@
 """
 Utility functions for the fiofetch application.
 """
+import base64
+import json
 import urllib.parse
+from datetime import date
+from typing import Tuple
 
 
 def mask_token(text: str, token: str) -> str:
@@ -41,3 +45,30 @@ def mask_token(text: str, token: str) -> str:
     
     return masked_text
 
+
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    """
+    Encode a (date, id) position as an opaque pagination cursor.
+    
+    Example:
+        >>> decode_cursor(encode_cursor(date(2025, 1, 31), 42))
+        (datetime.date(2025, 1, 31), 42)
+    """
+    raw = json.dumps([row_date.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """
+    Decode a cursor created by encode_cursor().
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        row_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(row_date), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
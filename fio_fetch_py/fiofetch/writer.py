@@ -0,0 +1,86 @@
+"""
+Database writer thread for the ingest paths.
+
+Saving a fetched statement (inserts, matching, rollup update, commit) is
+synchronous SQLAlchemy work. Running it on the event loop would stall every
+WebSocket, API request and progress broadcast until the save finishes, so
+fetch and backfill hand their writes to a single writer thread instead and
+await the result.
+
+The hand-off is bounded: at most WRITER_QUEUE_SIZE jobs are queued or running
+on the thread, further submitters wait on the event loop until a slot frees
+up. One thread matches SQLite, which allows a single writer at a time anyway.
+"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+WRITER_QUEUE_SIZE = 4
+
+
+class DatabaseWriter:
+    """A thread running submitted write jobs one at a time, in order."""
+
+    def __init__(self, maxsize: int = WRITER_QUEUE_SIZE, name: str = "fiofetch-db-writer"):
+        self.maxsize = maxsize
+        self.name = name
+        # Bounded by the per-loop semaphore in run(), so put() never blocks
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            future, func, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        # The semaphore belongs to the loop it was created on (tests run
+        # each asyncio.run() on a new loop)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.maxsize)
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on the writer thread and return its result.
+
+        Waits (without blocking the event loop) while the hand-off queue is
+        full. Exceptions raised by func are re-raised here.
+        """
+        self._ensure_started()
+        async with self._loop_slots():
+            future: Future = Future()
+            self._queue.put((future, func, args, kwargs))
+            return await asyncio.wrap_future(future)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Let the queued jobs finish and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+
+db_writer = DatabaseWriter()
@@ -4,3 +4,16 @@ import os
 
 # Add parent directory to path so we can import fiofetch
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fiofetch.database import get_engine, init_db, get_session_local
+
+@pytest.fixture
+def db_session(tmp_path):
+    """Fresh SQLite database session for each test."""
+    engine = get_engine(str(tmp_path / 'test_fio.db'))
+    init_db(engine)
+    SessionLocal = get_session_local(engine)
+    session = SessionLocal()
+    yield session
+    SessionLocal.remove()
+    engine.dispose()
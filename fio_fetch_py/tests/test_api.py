@@ -0,0 +1,521 @@
+import asyncio
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fiofetch.api import router, get_db, get_match_workers, get_export_dir
+from fiofetch.fio import fetch_and_save_transactions, ParsedStatement, FIO_COLUMNS
+from fiofetch.models import Transaction
+
+
+def make_tx(transaction_id, vs=None, ss=None, ks=None, amount=100.0, tx_date=date(2025, 1, 15), **extra):
+    """Build a transaction dict as produced by the Fio parsers."""
+    tx = dict.fromkeys(field for _, field, _ in FIO_COLUMNS)
+    tx.update({
+        'transaction_id': str(transaction_id),
+        'date': tx_date,
+        'amount': amount,
+        'currency': 'CZK',
+        'variable_symbol': vs,
+        'specific_symbol': ss,
+        'constant_symbol': ks,
+    })
+    tx.update(extra)
+    return tx
+
+
+def ingest(db_session, transactions):
+    """Save transactions through the regular fetch path."""
+    with patch('fiofetch.fio.fetch_statement', new=lambda *args: ParsedStatement(transactions)):
+        return asyncio.run(fetch_and_save_transactions('dummy_token', db_session, api_url='http://fio.test'))
+
+
+@pytest.fixture
+def client(db_session, tmp_path):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_match_workers] = lambda: 1
+    app.dependency_overrides[get_export_dir] = lambda: str(tmp_path / 'export')
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def upload(client, rows):
+    response = client.post("/api/v1/matching-data", json={"rows": rows})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_matches_are_maintained_on_ingest_and_upload(client, db_session):
+    upload(client, [{"variable_symbol": "111", "specific_symbol": "222"}])
+    assert client.get("/api/v1/matching-data/stats").json()["matched_transactions"] == 0
+
+    # New transactions are matched as they are ingested
+    assert ingest(db_session, [make_tx(1, '111', '222'), make_tx(2, '333', '444')]) == 2
+    stats = client.get("/api/v1/matching-data/stats").json()
+    assert stats["matched_transactions"] == 1
+    assert stats["total_transactions"] == 2
+
+    # A new upload rematches existing transactions
+    upload(client, [{"variable_symbol": "333", "specific_symbol": "444"}, {"variable_symbol": "111", "specific_symbol": "222"}])
+    assert client.get("/api/v1/matching-data/stats").json()["matched_transactions"] == 2
+
+    hidden = client.get("/api/v1/transactions", params={"hide_matched": True}).json()
+    assert hidden == []
+    assert client.get("/api/v1/transactions/count", params={"hide_matched": True}).json() == {"count": 0}
+
+    client.delete("/api/v1/matching-data")
+    assert client.get("/api/v1/transactions/count", params={"hide_matched": True}).json() == {"count": 2}
+
+
+def test_match_results_are_cached_per_generation(client, db_session):
+    upload(client, [{"variable_symbol": "111", "specific_symbol": "222"}])
+    ingest(db_session, [make_tx(1, '111', '222'), make_tx(2, '333', '444')])
+
+    first = client.get("/api/v1/matching-data/stats")
+    second = client.get("/api/v1/matching-data/stats")
+    assert first.headers["X-Match-Cache"] == "miss"
+    assert second.headers["X-Match-Cache"] == "hit"
+    assert first.json() == second.json()
+
+    listed = client.get("/api/v1/transactions", params={"hide_matched": True})
+    assert listed.headers["X-Match-Cache"] == "miss"
+    assert [t["transaction_id"] for t in listed.json()] == ["2"]
+    assert client.get("/api/v1/transactions", params={"hide_matched": True}).headers["X-Match-Cache"] == "hit"
+    # Only the ids on the page are cached, the rows are read again
+    db_session.query(Transaction).filter_by(transaction_id="2").update({"comment": "edited"})
+    db_session.commit()
+    cached = client.get("/api/v1/transactions", params={"hide_matched": True})
+    assert cached.headers["X-Match-Cache"] == "hit"
+    assert [t["comment"] for t in cached.json()] == ["edited"]
+    paged = client.get("/api/v1/transactions", params={"hide_matched": True, "limit": 1, "with_total": True})
+    assert paged.headers["X-Total-Count"] == "1" and "X-Next-Cursor" in paged.headers
+
+    # Ingesting new transactions invalidates cached results
+    ingest(db_session, [make_tx(3, '333', '444')])
+    refreshed = client.get("/api/v1/transactions/count", params={"hide_matched": True})
+    assert refreshed.headers["X-Match-Cache"] == "miss"
+    assert refreshed.json() == {"count": 2}
+
+
+def test_reconciliation_states(client, db_session):
+    today = date.today()
+    past = date(today.year - 1, 1, 1).isoformat()
+    future = date(today.year + 1, 1, 1).isoformat()
+    upload(client, [
+        {"variable_symbol": "1", "specific_symbol": "9", "row_data": {"amount": "1 000"}},
+        {"variable_symbol": "2", "specific_symbol": "9", "row_data": {"amount": 1000}},
+        {"variable_symbol": "3", "specific_symbol": "9", "row_data": {"amount": 1000}},
+        {"variable_symbol": "4", "specific_symbol": "9", "row_data": {"splits": [
+            {"amount": 500, "dueDate": past}, {"amount": 500, "dueDate": future},
+        ]}},
+        {"variable_symbol": "5", "specific_symbol": "9", "row_data": {"splits": [
+            {"amount": 500, "dueDate": past}, {"amount": 500, "dueDate": future},
+        ]}},
+        {"variable_symbol": "6", "specific_symbol": "9", "row_data": {"amount": 1000, "dueDate": future}},
+        {"variable_symbol": "7", "specific_symbol": "9"},
+        {"variable_symbol": "8", "specific_symbol": "9", "row_data": {"note": "no amount"}},
+    ])
+    ingest(db_session, [
+        make_tx(1, '1', '9', amount=400.0), make_tx(2, '1', '9', amount=600.0),
+        make_tx(3, '2', '9', amount=1200.0),
+        make_tx(4, '3', '9', amount=300.0),
+        make_tx(5, '4', '9', amount=100.0),
+        make_tx(6, '5', '9', amount=500.0, tx_date=date(2025, 3, 1)),
+        make_tx(7, '8', '9', amount=250.0),
+    ])
+
+    body = client.get("/api/v1/matching-data/reconciliation").json()
+    states = {row["variable_symbol"]: row["state"] for row in body["rows"]}
+    assert states == {
+        "1": "paid", "2": "overpaid", "3": "partial", "4": "overdue",
+        "5": "partial", "6": "unpaid", "7": "unknown", "8": "unknown",
+    }
+    # Money arrived, but nothing says how much was expected
+    no_amount = next(row for row in body["rows"] if row["variable_symbol"] == "8")
+    assert (no_amount["paid_amount"], no_amount["expected_amount"]) == (250.0, None)
+    first = body["rows"][0]
+    assert (first["paid_amount"], first["payment_count"], first["expected_amount"]) == (1000.0, 2, 1000.0)
+    assert body["summary"]["partial"] == 2
+
+    overdue = client.get("/api/v1/matching-data/reconciliation", params={"state": "overdue"}).json()
+    assert [row["variable_symbol"] for row in overdue["rows"]] == ["4"]
+
+
+def test_candidates_from_free_text(client, db_session):
+    upload(client, [
+        {"variable_symbol": "25070101", "specific_symbol": "1230101"},
+        {"variable_symbol": "25120001", "specific_symbol": "2240215", "constant_symbol": "0558"},
+    ])
+    ingest(db_session, [
+        make_tx(1, message_for_recipient="platba VS 25070101 SS 1230101"),
+        make_tx(2, vs='25120001', comment="za Jana 2240215"),
+        make_tx(3, message_for_recipient="VS25070101"),
+        make_tx(4, message_for_recipient="250701012 1230101"),
+        make_tx(5, '25070101', '1230101', message_for_recipient="25070101"),  # already matched
+    ])
+
+    candidates = client.get("/api/v1/matching-data/candidates").json()
+    by_tx = {c["transaction_id"]: c for c in candidates}
+    assert set(by_tx) == {"1", "2", "3"}
+    assert by_tx["1"]["confidence"] == "high"
+    assert by_tx["1"]["fields"] == ["message_for_recipient"]
+    # KS of the entry is missing from the transaction
+    assert by_tx["2"]["confidence"] == "low"
+    assert by_tx["3"]["confidence"] == "low"
+
+
+def test_matching_status_pagination_and_state(client, db_session):
+    upload(client, [
+        {"variable_symbol": str(vs), "specific_symbol": "9", "row_data": {"col_0": f"Person {vs}"}}
+        for vs in range(1, 6)
+    ])
+    ingest(db_session, [
+        make_tx(1, '2', '9', amount=100.0, tx_date=date(2025, 1, 1)),
+        make_tx(2, '2', '9', amount=50.0, tx_date=date(2025, 2, 1)),
+        make_tx(3, '4', '9', amount=10.0),
+    ])
+
+    rows = client.get("/api/v1/matching-data/status").json()
+    assert [row["state"] for row in rows] == ["unpaid", "paid", "unpaid", "paid", "unpaid"]
+    assert (rows[1]["payment_count"], rows[1]["paid_amount"], rows[1]["last_payment_date"]) == (2, 150.0, "2025-02-01")
+
+    unpaid = client.get("/api/v1/matching-data/status", params={"state": "unpaid", "skip": 1, "limit": 1}).json()
+    assert [row["variable_symbol"] for row in unpaid] == ["3"]
+    assert client.get("/api/v1/matching-data/status", params={"state": "bogus"}).status_code == 422
+
+
+def test_keyset_pagination(client, db_session):
+    ingest(db_session, [make_tx(i, tx_date=date(2025, 1, 1 + i % 3)) for i in range(1, 8)])
+    expected = [t["id"] for t in client.get("/api/v1/transactions").json()]
+
+    seen = []
+    params = {"limit": 3}
+    while True:
+        response = client.get("/api/v1/transactions", params=params)
+        seen.extend(t["id"] for t in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        # Rows inserted while paging don't shift later pages
+        ingest(db_session, [make_tx(100 + len(seen), tx_date=date(2025, 6, 1))])
+        params = {"limit": 3, "after": cursor}
+
+    assert seen == expected
+    assert client.get("/api/v1/transactions", params={"after": "garbage"}).status_code == 400
+
+
+def test_with_total_returns_count_in_same_response(client, db_session):
+    ingest(db_session, [make_tx(i, vs='77' if i % 2 else '88') for i in range(1, 8)])
+
+    response = client.get("/api/v1/transactions", params={"variable_symbol": "77", "limit": 2, "with_total": True})
+    assert len(response.json()) == 2
+    assert response.headers["X-Total-Count"] == "4"
+
+    past_end = client.get("/api/v1/transactions", params={"variable_symbol": "77", "skip": 10, "with_total": True})
+    assert past_end.json() == []
+    assert past_end.headers["X-Total-Count"] == "4"
+
+    cursor = response.headers["X-Next-Cursor"]
+    paged = client.get("/api/v1/transactions", params={"variable_symbol": "77", "after": cursor, "with_total": True})
+    assert paged.headers["X-Total-Count"] == "4"
+    assert "X-Total-Count" not in client.get("/api/v1/transactions").headers
+    assert client.get("/api/v1/transactions/count", params={"variable_symbol": "77"}).json() == {"count": 4}
+
+
+
+def test_fast_page_serialization_matches_model(client, db_session):
+    from fiofetch.api import TransactionOut
+
+    ingest(db_session, [
+        make_tx(1, '1', amount=1234.5, counter_account_name='Žluťoučký kůň', message_for_recipient='a "quoted" \\ text'),
+        make_tx(2, amount=-0.1, tx_date=date(2025, 3, 1)),
+        make_tx(3, amount=100.0),
+    ])
+    response = client.get("/api/v1/transactions")
+    assert response.headers["content-type"] == "application/json"
+
+    orm_rows = db_session.query(Transaction).order_by(Transaction.date.desc(), Transaction.id.desc())
+    expected = [TransactionOut.model_validate(t).model_dump(mode='json') for t in orm_rows]
+    assert response.json() == expected
+    assert '"counter_account_name":"Žluťoučký kůň"' in response.text
+
+def test_substring_filters_use_trigram_index(client, db_session):
+    from sqlalchemy import text
+    from fiofetch.search import fts_available
+
+    names = ["Pavel Novák", "Jan Novotný", "Fio banka", "NOVÁK s.r.o.", None]
+    ingest(db_session, [
+        make_tx(i, vs=f"25{i:04d}", counter_account_name=names[i % len(names)], bank_name="Fio banka, a.s.")
+        for i in range(1, 21)
+    ])
+    assert fts_available(db_session)
+
+    def ids(**params):
+        return sorted(t["id"] for t in client.get("/api/v1/transactions", params={"limit": 1000, **params}).json())
+
+    # Same results as the ilike() scan
+    for value in ("nov", "NOV", "novák", "s.r.o"):
+        assert ids(counter_account_name=value) == sorted(db_session.execute(
+            text("SELECT id FROM transactions WHERE lower(counter_account_name) LIKE lower(:pattern)"),
+            {"pattern": f"%{value}%"},
+        ).scalars())
+    assert len(ids(variable_symbol="25001", bank_name="banka")) == 10
+    # Patterns shorter than a trigram fall back to ilike
+    assert len(ids(variable_symbol="1")) == 11
+
+    # Deletes are mirrored by the triggers
+    client.delete("/api/v1/transactions")
+    assert ids(bank_name="banka") == []
+    fts_rows = db_session.execute(text("SELECT count(*) FROM transactions_fts WHERE bank_name LIKE '%banka%'")).scalar()
+    assert fts_rows == 0
+
+
+def test_date_amount_and_direction_filters(client, db_session):
+    ingest(db_session, [
+        make_tx(1, amount=1500.0, tx_date=date(2025, 3, 5)),
+        make_tx(2, amount=500.0, tx_date=date(2025, 3, 10)),
+        make_tx(3, amount=-2000.0, tx_date=date(2025, 3, 15)),
+        make_tx(4, amount=3000.0, tx_date=date(2025, 4, 1)),
+        make_tx(5, amount=5000.0, tx_date=date(2025, 3, 20), currency='EUR'),
+    ])
+
+    def ids(**params):
+        return sorted(int(t["transaction_id"]) for t in client.get("/api/v1/transactions", params=params).json())
+
+    last_month = {"date_from": "2025-03-01", "date_to": "2025-03-31"}
+    assert ids(**last_month) == [1, 2, 3, 5]
+    assert ids(**last_month, direction="incoming", currency="czk", amount_min=1000) == [1]
+    assert ids(direction="outgoing") == [3]
+    assert ids(amount_max=1500) == [1, 2, 3]
+    count = client.get("/api/v1/transactions/count", params={**last_month, "direction": "incoming"}).json()
+    assert count == {"count": 3}
+    assert client.get("/api/v1/transactions", params={"direction": "sideways"}).status_code == 422
+
+
+def test_streaming_export(client, db_session):
+    import csv
+    import gzip
+    import io
+    import json
+
+    ingest(db_session, [
+        make_tx(i, vs=str(i), amount=float(i), counter_account_name='Novák, "Pavel"' if i == 2 else None)
+        for i in range(1, 2501)
+    ])
+    listed = client.get("/api/v1/transactions", params={"limit": 1000}).json()
+
+    response = client.get("/api/v1/transactions/export", params={"format": "ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2500
+    assert rows[:1000] == listed
+
+    response = client.get("/api/v1/transactions/export", params={"amount_max": 2})
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["transaction_id"] for r in records] == ["2", "1"]
+    assert records[0]["counter_account_name"] == 'Novák, "Pavel"'
+
+    # Request the raw stream so the client doesn't decode it
+    with client.stream("GET", "/api/v1/transactions/export", params={"format": "ndjson", "gzip": True}) as streamed:
+        assert streamed.headers["content-encoding"] == "gzip"
+        raw = b"".join(streamed.iter_raw())
+    assert gzip.decompress(raw).decode() == "\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + "\n"
+
+
+def test_parquet_export_is_incremental(client, db_session, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import pyarrow as pa
+    from decimal import Decimal
+
+    upload(client, [{"variable_symbol": "1", "specific_symbol": "9", "constant_symbol": "0308"}])
+    ingest(db_session, [
+        make_tx(1, vs='1', amount=1.1, tx_date=date(2025, 1, 31)),
+        make_tx(2, vs='1', amount=-20.0, tx_date=date(2025, 2, 1)),
+    ])
+    first = client.post("/api/v1/export/parquet").json()
+    assert (first["transactions_written"], first["matching_data_rows"]) == (2, 1)
+
+    ingest(db_session, [make_tx(3, vs='2', amount=300.0, tx_date=date(2025, 2, 2))])
+    second = client.post("/api/v1/export/parquet").json()
+    assert second["transactions_written"] == 1
+    assert client.post("/api/v1/export/parquet").json()["transactions_written"] == 0
+
+    export_dir = tmp_path / 'export'
+    table = pq.read_table(export_dir / 'transactions')
+    assert sorted(table.column('transaction_id').to_pylist()) == ['1', '2', '3']
+    assert table.schema.field('date').type == pa.date32()
+    assert table.schema.field('amount').type == pa.decimal128(18, 2)
+    assert pa.types.is_dictionary(table.schema.field('variable_symbol').type)
+    assert sorted(table.column('amount').to_pylist()) == [Decimal('-20.00'), Decimal('1.10'), Decimal('300.00')]
+    assert len(list((export_dir / 'transactions' / 'month=2025-02').glob('*.parquet'))) == 2
+    assert pq.read_table(export_dir / 'matching_data.parquet').column('constant_symbol').to_pylist() == ['0308']
+
+    # After a reset SQLite hands out ids 1, 2, ... again; re-ingesting past
+    # the last exported id must not leave the deleted rows in the export
+    client.delete("/api/v1/transactions")
+    ingest(db_session, [make_tx(10 + i, tx_date=date(2025, 3, 1)) for i in range(4)])
+    reset = client.post("/api/v1/export/parquet").json()
+    assert reset["transactions_written"] == 4
+    table = pq.read_table(export_dir / 'transactions')
+    assert sorted(table.column('transaction_id').to_pylist()) == ['10', '11', '12', '13']
+    assert client.post("/api/v1/export/parquet").json()["transactions_written"] == 0
+
+
+def test_conditional_get_with_etag(client, db_session):
+    ingest(db_session, [make_tx(1, '1'), make_tx(2, '2')])
+
+    first = client.get("/api/v1/transactions", params={"limit": 10})
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert client.get("/api/v1/transactions", params={"limit": 5}).headers["ETag"] != etag
+
+    # Unchanged data: 304 without running the page query
+    with patch('fiofetch.api.export_select', side_effect=AssertionError("page queried for a 304")):
+        cached = client.get("/api/v1/transactions", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    stats_etag = client.get("/api/v1/matching-data/stats").headers["ETag"]
+    ingest(db_session, [make_tx(3, '3')])
+    refreshed = client.get("/api/v1/transactions", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()) == 3
+    assert client.get("/api/v1/matching-data/stats", headers={"If-None-Match": stats_etag}).status_code == 200
+
+
+def test_writes_of_other_processes_invalidate_etags_and_cache(client, db_session, tmp_path):
+    from fiofetch.database import get_engine, get_session_local
+
+    ingest(db_session, [make_tx(1, '1')])
+    etag = client.get("/api/v1/transactions").headers["ETag"]
+    assert client.get("/api/v1/transactions/count", params={"hide_matched": True}).json() == {"count": 1}
+
+    # Another process (e.g. `fiofetch backfill`) with its own engine writes to the same file
+    engine = get_engine(str(tmp_path / 'test_fio.db'))
+    SessionLocal = get_session_local(engine)
+    try:
+        ingest(SessionLocal(), [make_tx(2, '2')])
+    finally:
+        SessionLocal.remove()
+        engine.dispose()
+
+    refreshed = client.get("/api/v1/transactions", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()) == 2
+    counted = client.get("/api/v1/transactions/count", params={"hide_matched": True})
+    assert counted.headers["X-Match-Cache"] == "miss"
+    assert counted.json() == {"count": 2}
+
+
+def test_writes_between_fetch_and_insert_keep_matches_and_rollup(client, db_session, tmp_path, monkeypatch):
+    from fiofetch import fio
+    from fiofetch.api import delete_all_transactions
+    from fiofetch.database import get_engine, get_session_local
+
+    upload(client, [{"variable_symbol": "111", "specific_symbol": "222"}])
+    ingest(db_session, [make_tx(i, '111', '222') for i in range(1, 4)])
+
+    # Another writer (an API request, `fiofetch backfill`) commits after the
+    # fetch has started but before its rows are inserted
+    engine = get_engine(str(tmp_path / 'test_fio.db'))
+    SessionLocal = get_session_local(engine)
+    other = SessionLocal()
+    pending = []
+    transaction_row = fio.transaction_row
+
+    def racing_row(tr_data):
+        while pending:
+            pending.pop(0)()
+        return transaction_row(tr_data)
+
+    monkeypatch.setattr('fiofetch.fio.transaction_row', racing_row)
+    try:
+        # Deleted rows: the new ones reuse their ids and must still be matched
+        pending.append(lambda: delete_all_transactions(other))
+        assert ingest(db_session, [make_tx(i, '111', '222') for i in range(4, 7)]) == 3
+        assert client.get("/api/v1/transactions/count", params={"hide_matched": True}).json() == {"count": 0}
+
+        # Rows inserted in between are matched and rolled up once, by their writer
+        pending.append(lambda: fio.commit_transactions(other, [make_tx(7, '111', '222'), make_tx(8)]))
+        assert ingest(db_session, [make_tx(9, '111', '222'), make_tx(10)]) == 2
+    finally:
+        SessionLocal.remove()
+        engine.dispose()
+
+    assert client.get("/api/v1/transactions/count").json() == {"count": 7}
+    assert client.get("/api/v1/transactions/count", params={"hide_matched": True}).json() == {"count": 2}
+    counted = client.get("/api/v1/transactions/aggregate", params={"group_by": "currency", "metric": "count"})
+    assert counted.json() == [{"key": "CZK", "value": 7}]
+
+
+def test_aggregate_from_daily_rollup(client, db_session):
+    from collections import defaultdict
+
+    txs = [
+        make_tx(i, amount=(-1) ** i * (10.0 + i), tx_date=date(2024 + i % 2, 1 + i % 12, 1 + i % 3),
+                counter_account=[None, '111', '222'][i % 3], currency='EUR' if i % 5 == 0 else 'CZK')
+        for i in range(1, 40)
+    ]
+    # Two fetches, the second one adding to days already in the rollup
+    ingest(db_session, txs[:20])
+    ingest(db_session, txs[20:])
+
+    keys = {
+        'day': lambda tx: tx['date'].isoformat(),
+        'month': lambda tx: tx['date'].strftime('%Y-%m'),
+        'counter_account': lambda tx: tx.get('counter_account') or '',
+        'currency': lambda tx: tx['currency'],
+    }
+    for group_by, key in keys.items():
+        sums, counts = defaultdict(float), defaultdict(int)
+        for tx in txs:
+            if tx['amount'] > 0:
+                sums[key(tx)] += tx['amount']
+                counts[key(tx)] += 1
+        params = {"group_by": group_by, "direction": "incoming"}
+        summed = client.get("/api/v1/transactions/aggregate", params={**params, "metric": "sum"}).json()
+        assert summed == [{"key": k, "value": round(sums[k], 2)} for k in sorted(sums)]
+        counted = client.get("/api/v1/transactions/aggregate", params={**params, "metric": "count"}).json()
+        assert counted == [{"key": k, "value": counts[k]} for k in sorted(counts)]
+
+    eur = client.get("/api/v1/transactions/aggregate", params={"group_by": "currency", "metric": "count", "currency": "eur"})
+    assert eur.json() == [{"key": "EUR", "value": 7}]
+    assert client.get("/api/v1/transactions/aggregate", params={"group_by": "week"}).status_code == 422
+
+    client.delete("/api/v1/transactions")
+    assert client.get("/api/v1/transactions/aggregate").json() == []
+
+
+def test_aggregate_directions_match_the_list_filter(client, db_session):
+    ingest(db_session, [make_tx(1, amount=100.0), make_tx(2, amount=0.0), make_tx(3, amount=-40.0)])
+
+    for direction in ("incoming", "outgoing"):
+        listed = client.get("/api/v1/transactions/count", params={"direction": direction}).json()["count"]
+        aggregated = client.get("/api/v1/transactions/aggregate",
+                                params={"group_by": "currency", "metric": "count", "direction": direction}).json()
+        assert aggregated == [{"key": "CZK", "value": listed}]
+        assert listed == 1
+    # The 0.00 movement is only counted without a direction
+    total = client.get("/api/v1/transactions/aggregate", params={"group_by": "currency", "metric": "count"}).json()
+    assert total == [{"key": "CZK", "value": 3}]
+
+
+def test_overlapping_fetches_skip_stored_transactions(client, db_session):
+    from fiofetch.fio import save_transactions
+
+    assert ingest(db_session, [make_tx(1, '1'), make_tx(2), make_tx(3)]) == 3
+    # Already stored and repeated rows are skipped without failing the batch
+    assert ingest(db_session, [make_tx(2), make_tx(3), make_tx(4), make_tx(4)]) == 1
+    assert save_transactions(db_session, [make_tx(4), make_tx(5), make_tx(6)], chunk_size=2) == (2, 1)
+    db_session.rollback()
+
+    assert client.get("/api/v1/transactions/count").json() == {"count": 4}
+    counted = client.get("/api/v1/transactions/aggregate", params={"group_by": "currency", "metric": "count"})
+    assert counted.json() == [{"key": "CZK", "value": 4}]
+
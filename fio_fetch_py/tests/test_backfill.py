@@ -0,0 +1,99 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from fiofetch.backfill import backfill, period_chunks
+from fiofetch.cache import read_data_version
+from fiofetch.fio import FioApiError, ParsedStatement
+from fiofetch.models import BackfillProgress, Transaction
+
+
+def test_period_chunks_cover_the_range():
+    chunks = period_chunks(date(2024, 1, 1), date(2024, 3, 5), chunk_days=30)
+    assert chunks[0] == (date(2024, 1, 1), date(2024, 1, 30))
+    assert chunks[-1] == (date(2024, 3, 1), date(2024, 3, 5))
+    days = [start + timedelta(days=i) for start, end in chunks for i in range((end - start).days + 1)]
+    assert days == [date(2024, 1, 1) + timedelta(days=i) for i in range(65)]
+    assert period_chunks(date(2024, 1, 1), date(2024, 1, 1)) == [(date(2024, 1, 1), date(2024, 1, 1))]
+
+
+class FakePeriods:
+    """Stands in for fetch_period: one transaction per day of the requested chunk."""
+
+    def __init__(self, fail_on=None):
+        self.requests = []
+        self.fail_on = fail_on
+
+    @asynccontextmanager
+    async def __call__(self, token, api_url, start, end):
+        self.requests.append((time.monotonic(), start, end))
+        if len(self.requests) == self.fail_on:
+            raise FioApiError(500, 'boom')
+        transactions = []
+        day = start
+        while day <= end:
+            transactions.append({'transaction_id': day.isoformat(), 'date': day, 'amount': 1.0, 'currency': 'CZK'})
+            day += timedelta(days=1)
+        yield ParsedStatement(transactions)
+
+
+def run_backfill(db_session, fake, date_to=date(2024, 4, 9), **kwargs):
+    with patch('fiofetch.backfill.fetch_period', new=fake):
+        return asyncio.run(backfill('token', 'http://fio.test', db_session, date(2024, 1, 1), date_to, **kwargs))
+
+
+def test_backfill_spaces_requests(db_session):
+    fake = FakePeriods()
+    summary = run_backfill(db_session, fake, chunk_days=25, spacing=0.05)
+    assert summary == {'chunks': 4, 'inserted': 100, 'skipped': 0}
+    times = [t for t, _, _ in fake.requests]
+    assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+    assert db_session.query(Transaction).count() == 100
+
+
+def test_backfill_resumes_after_last_completed_chunk(db_session):
+    failing = FakePeriods(fail_on=3)
+    with pytest.raises(FioApiError):
+        run_backfill(db_session, failing, chunk_days=25, spacing=0)
+    progress = db_session.query(BackfillProgress).one()
+    assert progress.completed_to == date(2024, 2, 19)
+
+    resumed = FakePeriods()
+    summary = run_backfill(db_session, resumed, chunk_days=25, spacing=0)
+    assert [start for _, start, _ in resumed.requests] == [date(2024, 2, 20), date(2024, 3, 16)]
+    assert summary['inserted'] == 50
+    assert db_session.query(Transaction).count() == 100
+
+
+def test_backfill_rerun_on_a_later_day_continues(db_session):
+    with pytest.raises(FioApiError):
+        run_backfill(db_session, FakePeriods(fail_on=3), chunk_days=25, spacing=0)
+
+    # Without --to the end is today's date, so a rerun the next week has a new end
+    resumed = FakePeriods()
+    summary = run_backfill(db_session, resumed, date_to=date(2024, 4, 16), chunk_days=25, spacing=0)
+    assert [(start, end) for _, start, end in resumed.requests] == [
+        (date(2024, 2, 20), date(2024, 3, 15)), (date(2024, 3, 16), date(2024, 4, 9)), (date(2024, 4, 10), date(2024, 4, 16)),
+    ]
+    assert summary == {'chunks': 3, 'inserted': 57, 'skipped': 0}
+
+    # Finished: only days after the previous end are downloaded
+    extended = FakePeriods()
+    assert run_backfill(db_session, extended, date_to=date(2024, 4, 20), chunk_days=25, spacing=0)['inserted'] == 4
+    assert [start for _, start, _ in extended.requests] == [date(2024, 4, 17)]
+    assert db_session.query(Transaction).count() == 111
+
+
+def test_backfill_bumps_the_stored_data_version_per_chunk(db_session):
+    def counter():
+        return int(read_data_version(db_session).rsplit('-', 1)[1])
+
+    before = counter()
+    with pytest.raises(FioApiError):
+        run_backfill(db_session, FakePeriods(fail_on=3), chunk_days=25, spacing=0)
+    # One bump per committed chunk, none for the failed one
+    assert counter() == before + 2
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fiofetch.cache import GenerationCache, bump_data_version, read_data_version
+from fiofetch.database import get_engine, init_db
+
+
+def test_concurrent_callers_share_one_computation():
+    cache = GenerationCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(cache.get_or_compute, 'key', 'v1', compute)
+        started.wait(5)
+        others = [pool.submit(cache.get_or_compute, 'key', 'v1', compute) for _ in range(3)]
+        release.set()
+        results = [first.result()] + [f.result() for f in others]
+
+    assert len(calls) == 1
+    assert results[0] == (42, False)
+    assert all(result == (42, True) for result in results[1:])
+
+
+def test_bump_invalidates_entries(db_session):
+    cache = GenerationCache()
+    version = read_data_version(db_session)
+    assert cache.get_or_compute('key', version, lambda: 1) == (1, False)
+    assert cache.get_or_compute('key', read_data_version(db_session), lambda: 2) == (1, True)
+    bump_data_version(db_session)
+    db_session.commit()
+    assert read_data_version(db_session) != version
+    assert cache.get_or_compute('key', read_data_version(db_session), lambda: 3) == (3, False)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_data_version_is_shared_between_engines(tmp_path):
+    # Two engines on one file stand in for the server and e.g. `fiofetch backfill`
+    path = str(tmp_path / 'shared.db')
+    server, other = get_engine(path), get_engine(path)
+    init_db(server)
+    with server.connect() as conn:
+        before = read_data_version(conn)
+    with other.begin() as conn:
+        bump_data_version(conn)
+    with server.connect() as conn:
+        after = read_data_version(conn)
+    assert after != before
+    # The token part identifies the database and survives restarts
+    init_db(server)
+    with server.connect() as conn:
+        assert read_data_version(conn) == after
+    server.dispose()
+    other.dispose()
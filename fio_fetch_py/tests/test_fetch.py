@@ -0,0 +1,251 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from fiofetch.fio import fetch_and_save_transactions, parse_statement, FioApiError, ParsedStatement
+from fiofetch.models import FetchCursor, Transaction
+
+
+def statement(ids, id_last_download=None):
+    """Fio statement JSON with movements of the given ids."""
+    return {
+        'accountStatement': {
+            'info': {
+                'accountId': '2400222222',
+                'idFrom': ids[0] if ids else None,
+                'idTo': ids[-1] if ids else None,
+                'idLastDownload': id_last_download,
+            },
+            'transactionList': {
+                'transaction': [
+                    {
+                        'column22': {'value': movement_id},
+                        'column0': {'value': '2025-01-15+0100'},
+                        'column1': {'value': 100.0},
+                        'column14': {'value': 'CZK'},
+                    }
+                    for movement_id in ids
+                ],
+            },
+        },
+    }
+
+
+class FakeFio:
+    """Stands in for the Fio API requests of fiofetch.fio, answering per endpoint."""
+
+    def __init__(self):
+        self.responses = {}
+        self.calls = []
+
+    async def __call__(self, url):
+        endpoint = url.split('/v1/rest/')[1].split('/')[0]
+        self.calls.append(endpoint)
+        response = self.responses[endpoint]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    @asynccontextmanager
+    async def statement(self, url):
+        info, transactions = parse_statement(await self(url))
+        yield ParsedStatement(transactions, info)
+
+
+def run_fetch(db_session, fio):
+    with patch('fiofetch.fio._get', new=fio), patch('fiofetch.fio._get_statement', new=fio.statement):
+        return asyncio.run(fetch_and_save_transactions(
+            'secret-token', db_session, api_url='http://fio.test/v1/rest', fetch_mode='incremental'
+        ))
+
+
+def test_incremental_fetch_keeps_a_cursor(db_session):
+    fio = FakeFio()
+
+    # No cursor yet: window download, cursor stored but not synced with Fio
+    fio.responses['periods'] = statement([9, 10])
+    assert run_fetch(db_session, fio) == 2
+    cursor = db_session.query(FetchCursor).one()
+    assert (cursor.account_id, cursor.last_id, cursor.synced) == ('2400222222', 10, False)
+
+    # Next run moves Fio's pointer to the cursor instead of downloading
+    fio.responses['set-last-id'] = ''
+    assert run_fetch(db_session, fio) == 0
+    assert db_session.query(FetchCursor).one().synced
+
+    # Then only new movements come through /last
+    fio.responses['last'] = statement([11, 12], id_last_download=10)
+    assert run_fetch(db_session, fio) == 2
+    assert db_session.query(FetchCursor).one().last_id == 12
+
+    fio.responses['last'] = statement([], id_last_download=12)
+    assert run_fetch(db_session, fio) == 0
+    assert fio.calls == ['periods', 'set-last-id', 'last', 'last']
+
+    # Fio's pointer moved past the cursor: keep the rows, fall back to the window next time
+    fio.responses['last'] = statement([16], id_last_download=15)
+    assert run_fetch(db_session, fio) == 1
+    assert db_session.query(FetchCursor).count() == 0
+    fio.responses['periods'] = statement([13, 14, 15, 16])
+    assert run_fetch(db_session, fio) == 3
+    assert fio.calls[-1] == 'periods'
+    assert db_session.query(Transaction).count() == 8
+
+
+def test_incremental_fetch_drops_cursor_when_history_is_too_long(db_session):
+    db_session.add(FetchCursor(account_id='1', token_fingerprint='x', last_id=1, synced=True,
+                               updated_at=datetime(2025, 1, 1)))
+    db_session.commit()
+    fio = FakeFio()
+    fio.responses['periods'] = statement([5])
+    assert run_fetch(db_session, fio) == 1
+    # A cursor of another token is not used
+    assert fio.calls == ['periods']
+
+    fio.responses['set-last-id'] = ''
+    run_fetch(db_session, fio)
+    fio.responses['last'] = FioApiError(422, 'too long')
+    with pytest.raises(FioApiError):
+        run_fetch(db_session, fio)
+    assert db_session.query(FetchCursor).filter(FetchCursor.last_id == 5).count() == 0
+
+
+class ChunkedStream:
+    """Async stream handing out a document a few bytes at a time."""
+
+    def __init__(self, data, size=7):
+        self.data = data
+        self.size = size
+        self.reads = 0
+
+    async def read(self, n=-1):
+        self.reads += 1
+        n = len(self.data) if n < 0 else min(n, self.size)
+        chunk, self.data = self.data[:n], self.data[n:]
+        return chunk
+
+
+def test_statement_reader_matches_full_parse():
+    import io
+    import json
+    import os
+    from fiofetch.fio import StatementReader
+
+    path = os.path.join(os.path.dirname(__file__), '..', 'examples', 'tr.json')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    expected_info, expected = parse_statement(json.loads(raw))
+
+    reader = StatementReader()
+    assert list(reader.iter_file(io.BytesIO(raw))) == expected
+    assert reader.info == expected_info
+
+    async def read_async(stream):
+        reader = StatementReader()
+        return reader, [tx async for tx in reader.iter_async(stream)]
+
+    stream = ChunkedStream(raw)
+    reader, transactions = asyncio.run(read_async(stream))
+    assert transactions == expected
+    assert reader.info == expected_info
+    assert isinstance(transactions[0]['amount'], float)
+    assert stream.reads > 10
+
+
+def test_fetch_period_streams_from_http_response():
+    import json
+    import os
+    from datetime import date
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from fiofetch.fio import fetch_period
+
+    path = os.path.join(os.path.dirname(__file__), '..', 'examples', 'tr.json')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    requested = []
+
+    async def periods(request):
+        requested.append(request.path)
+        response = web.StreamResponse(headers={'Content-Type': 'application/json'})
+        await response.prepare(request)
+        for i in range(0, len(raw), 100):
+            await response.write(raw[i:i + 100])
+        return response
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/v1/rest/periods/{token}/{start}/{end}/transactions.json', periods)
+        async with TestServer(app) as server:
+            async with fetch_period('tok', str(server.make_url('/v1/rest')), date(2025, 1, 1), date(2025, 1, 31)) as statement:
+                transactions = [transaction async for transaction in statement]
+            return statement.info, transactions
+
+    info, transactions = asyncio.run(run())
+    assert requested == ['/v1/rest/periods/tok/2025-01-01/2025-01-31/transactions.json']
+    assert (info, transactions) == parse_statement(json.loads(raw))
+
+
+def test_saving_does_not_block_the_event_loop(db_session):
+    import time
+    from datetime import date, timedelta
+
+    transactions = [
+        {'transaction_id': str(30_000_000_000 + i), 'date': date(2024, 1, 1) + timedelta(days=i % 365),
+         'amount': float(i % 5000), 'currency': 'CZK', 'variable_symbol': str(i % 300),
+         'message_for_recipient': f'Platba {i}'}
+        for i in range(30000)
+    ]
+    progress = []
+
+    async def run():
+        loop_lag = 0.0
+        saving = asyncio.create_task(fetch_and_save_transactions(
+            'token', db_session, lambda *args: progress.append(asyncio.get_running_loop()), api_url='http://fio.test'
+        ))
+        started = time.perf_counter()
+        while not saving.done():
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            loop_lag = max(loop_lag, time.perf_counter() - before - 0.005)
+        return await saving, loop_lag, time.perf_counter() - started
+
+    with patch('fiofetch.fio.fetch_statement', new=lambda *args: ParsedStatement(transactions)):
+        count, loop_lag, elapsed = asyncio.run(run())
+
+    assert count == 30000
+    # The save itself takes a while, the loop keeps ticking meanwhile
+    assert loop_lag < 0.1 < elapsed
+    # Progress is reported per saved batch, on the event loop
+    assert len(progress) > 2 and all(progress)
+
+
+def test_statement_is_saved_in_batches_while_it_is_read(db_session):
+    from fiofetch import fio
+    from fiofetch.fio import INSERT_CHUNK_SIZE, save_statement
+
+    read = []
+    committed = []
+    in_memory = []
+
+    async def statement():
+        for i in range(INSERT_CHUNK_SIZE * 3 + 7):
+            read.append(i)
+            in_memory.append(len(read) - sum(committed))
+            yield {'transaction_id': str(i), 'date': datetime(2025, 1, 1).date(), 'amount': 1.0, 'currency': 'CZK'}
+
+    commit = fio.commit_transactions
+
+    def counting_commit(session, transactions, *args):
+        committed.append(len(transactions))
+        return commit(session, transactions, *args)
+
+    with patch('fiofetch.fio.commit_transactions', new=counting_commit):
+        assert asyncio.run(save_statement(db_session, statement())) == (len(read), 0)
+    assert committed == [INSERT_CHUNK_SIZE] * 3 + [7]
+    # Never more than one batch is held before it is handed to the writer
+    assert max(in_memory) <= INSERT_CHUNK_SIZE
+    assert db_session.query(Transaction).count() == len(read)
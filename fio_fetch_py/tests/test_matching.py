@@ -0,0 +1,198 @@
+import random
+from datetime import date
+
+from sqlalchemy import text
+
+from fiofetch.database import get_engine, init_db, get_session_local
+from fiofetch.matching import (
+    normalize_symbol, match_transaction_ids, symbol_norms, rematch_all, match_pairs_parallel, iter_matches, build_index
+)
+from fiofetch.models import Transaction, MatchingData, TransactionMatch
+
+
+def legacy_matched_ids(entries, transactions):
+    """Reference nested-loop implementation the engine must agree with."""
+    matched_ids = set()
+    for _, e_vs, e_ss, e_ks in entries:
+        entry_vs = normalize_symbol(e_vs)
+        entry_ss = normalize_symbol(e_ss)
+        if not entry_vs or not entry_ss:
+            continue
+        for tx_id, t_vs, t_ss, t_ks in transactions:
+            tx_vs = normalize_symbol(t_vs)
+            tx_ss = normalize_symbol(t_ss)
+            if not tx_vs or not tx_ss:
+                continue
+            if entry_vs != tx_vs or entry_ss != tx_ss:
+                continue
+            entry_ks = normalize_symbol(e_ks)
+            if entry_ks:
+                tx_ks = normalize_symbol(t_ks)
+                if not tx_ks or entry_ks != tx_ks:
+                    continue
+            matched_ids.add(tx_id)
+    return matched_ids
+
+
+def random_symbol(rng, pool):
+    roll = rng.random()
+    if roll < 0.1:
+        return rng.choice([None, '', '-', 'NULL', 'undefined', 'N/A', '  '])
+    value = rng.choice(pool)
+    if roll < 0.2:
+        return f"  {value} "
+    return value
+
+
+def random_rows(rng, count, start_id=1):
+    vs_pool = [str(n) for n in range(25070101, 25070131)]
+    ss_pool = [str(n) for n in range(1230101, 1230111)]
+    ks_pool = ['0308', '0558', '0008']
+    return [
+        (start_id + i, random_symbol(rng, vs_pool), random_symbol(rng, ss_pool), random_symbol(rng, ks_pool))
+        for i in range(count)
+    ]
+
+
+def test_normalize_symbol():
+    assert normalize_symbol(None) == ''
+    assert normalize_symbol('  123 ') == '123'
+    assert normalize_symbol(123) == '123'
+    for empty in ('', ' ', '-', 'null', 'NULL', 'undefined', 'N/A', 'n/a'):
+        assert normalize_symbol(empty) == ''
+
+
+def test_engine_parity_with_legacy_loop():
+    rng = random.Random(42)
+    for _ in range(20):
+        entries = random_rows(rng, rng.randint(0, 60))
+        transactions = random_rows(rng, rng.randint(0, 300))
+        assert match_transaction_ids(entries, transactions) == legacy_matched_ids(entries, transactions)
+
+
+def test_ks_is_optional_on_entry():
+    entries = [(1, '111', '222', None), (2, '333', '444', '0558')]
+    transactions = [
+        (10, '111', '222', '9999'),  # entry 1 ignores KS
+        (11, '333', '444', '0558'),  # entry 2 KS matches
+        (12, '333', '444', '0308'),  # entry 2 KS differs
+        (13, '333', '444', None),    # entry 2 requires KS
+        (14, '111', None, None),     # missing SS
+    ]
+    assert match_transaction_ids(entries, transactions) == {10, 11}
+
+
+def test_get_matched_transaction_ids_parity(db_session):
+    from fiofetch.api import get_matched_transaction_ids
+
+    rng = random.Random(7)
+    entries = random_rows(rng, 40)
+    transactions = random_rows(rng, 200)
+    for _, vs, ss, ks in entries:
+        db_session.add(MatchingData(
+            variable_symbol=vs, specific_symbol=ss, constant_symbol=ks, created_at=date.today(),
+            **symbol_norms(vs, ss, ks)
+        ))
+    for tx_id, vs, ss, ks in transactions:
+        db_session.add(Transaction(
+            id=tx_id, transaction_id=str(tx_id), date=date(2025, 1, 1), amount=100.0, currency='CZK',
+            variable_symbol=vs, specific_symbol=ss, constant_symbol=ks,
+            **symbol_norms(vs, ss, ks)
+        ))
+    db_session.flush()
+    rematch_all(db_session)
+    db_session.commit()
+
+    assert get_matched_transaction_ids(db_session) == legacy_matched_ids(entries, transactions)
+
+
+def test_migration_backfills_symbol_norms(tmp_path):
+    from fiofetch.api import get_matched_transaction_ids
+
+    db_path = str(tmp_path / 'old.db')
+    engine = get_engine(db_path)
+    # Schema as created by versions without the normalized columns
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY, transaction_id VARCHAR NOT NULL UNIQUE, "
+            "date DATE NOT NULL, amount FLOAT NOT NULL, currency VARCHAR NOT NULL, counter_account VARCHAR, "
+            "counter_account_name VARCHAR, bank_code VARCHAR, bank_name VARCHAR, constant_symbol VARCHAR, "
+            "variable_symbol VARCHAR, specific_symbol VARCHAR, user_identification VARCHAR, "
+            "message_for_recipient VARCHAR, type VARCHAR, executor VARCHAR, specification VARCHAR, "
+            "comment VARCHAR, bic VARCHAR, instruction_id VARCHAR, payer_reference VARCHAR)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE matching_data (id INTEGER PRIMARY KEY, variable_symbol VARCHAR, "
+            "specific_symbol VARCHAR, constant_symbol VARCHAR, row_data TEXT, created_at DATE NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transactions (id, transaction_id, date, amount, currency, variable_symbol, "
+            "specific_symbol, constant_symbol) VALUES "
+            "(1, '1', '2025-01-01', 10, 'CZK', ' 111 ', '222', NULL), "
+            "(2, '2', '2025-01-01', 10, 'CZK', '111', 'null', NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO matching_data (id, variable_symbol, specific_symbol, constant_symbol, created_at) "
+            "VALUES (1, '111', '222', '-', '2025-01-01')"
+        ))
+
+    init_db(engine)
+    SessionLocal = get_session_local(engine)
+    session = SessionLocal()
+    try:
+        tx = session.get(Transaction, 2)
+        assert (tx.vs_norm, tx.ss_norm, tx.ks_norm) == ('111', None, None)
+        assert get_matched_transaction_ids(session) == {1}
+        # The rollup table is new too and gets built from existing rows
+        from fiofetch.rollup import aggregate
+        assert aggregate(session, 'day', 'sum') == [{'key': '2025-01-01', 'value': 20.0}]
+
+        # Older rollups counted zero amounts as incoming
+        session.execute(text(
+            "INSERT INTO transactions (id, transaction_id, date, amount, currency) "
+            "VALUES (3, '3', '2025-01-02', 0, 'CZK')"
+        ))
+        session.execute(text(
+            "INSERT INTO daily_rollup (day, currency, counter_account, direction, amount_sum, tx_count) "
+            "VALUES ('2025-01-02', 'CZK', '', 'incoming', 0, 1)"
+        ))
+        session.commit()
+        init_db(engine)
+        assert aggregate(session, 'day', 'count', direction='incoming') == [{'key': '2025-01-01', 'value': 2}]
+        assert aggregate(session, 'day', 'count')[-1] == {'key': '2025-01-02', 'value': 1}
+    finally:
+        SessionLocal.remove()
+        engine.dispose()
+
+
+def test_parallel_matching_parity():
+    rng = random.Random(3)
+    entries = random_rows(rng, 80)
+    transactions = random_rows(rng, 500)
+    expected = sorted(iter_matches(build_index(entries), transactions))
+    assert sorted(match_pairs_parallel(entries, transactions, workers=3)) == expected
+
+
+def test_parallel_rematch_parity(db_session):
+    rng = random.Random(11)
+    for _, vs, ss, ks in random_rows(rng, 50):
+        db_session.add(MatchingData(
+            variable_symbol=vs, specific_symbol=ss, constant_symbol=ks, created_at=date.today(),
+            **symbol_norms(vs, ss, ks)
+        ))
+    for tx_id, vs, ss, ks in random_rows(rng, 300):
+        db_session.add(Transaction(
+            id=tx_id, transaction_id=str(tx_id), date=date(2025, 1, 1), amount=100.0, currency='CZK',
+            variable_symbol=vs, specific_symbol=ss, constant_symbol=ks,
+            **symbol_norms(vs, ss, ks)
+        ))
+    db_session.flush()
+
+    def stored_pairs():
+        return sorted(db_session.query(TransactionMatch.tx_id, TransactionMatch.matching_data_id).all())
+
+    rematch_all(db_session)
+    in_database = stored_pairs()
+    rematch_all(db_session, workers=2)
+    assert stored_pairs() == in_database
+    assert in_database
@@ -0,0 +1,83 @@
+import gzip
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from fiofetch.middleware import NoCacheMiddleware, CompressionMiddleware, _accepted_encodings
+
+BIG = [{"id": i, "message": "Platba za objednávku"} for i in range(200)]
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/api/v1/big")
+    def big():
+        return BIG
+
+    @app.get("/api/v1/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/api/v1/tagged")
+    def tagged(response: Response):
+        response.headers["ETag"] = 'W/"1"'
+        return {"ok": True}
+
+    @app.get("/api/v1/stream")
+    def stream():
+        return StreamingResponse((b'{"n": %d}\n' % i * 50 for i in range(10)), media_type="application/x-ndjson")
+
+    @app.get("/api/v1/encoded")
+    def encoded():
+        body = gzip.compress(b"x" * 5000)
+        return Response(body, media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/index.html")
+    def index():
+        return Response("<h1>UI</h1>", media_type="text/html")
+
+    app.add_middleware(NoCacheMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped():
+    client = make_client()
+    response = client.get("/api/v1/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == BIG
+
+    plain = client.get("/api/v1/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == BIG
+
+
+def test_small_streaming_and_encoded_responses_pass_through():
+    client = make_client()
+    headers = {"Accept-Encoding": "gzip"}
+    assert "content-encoding" not in client.get("/api/v1/small", headers=headers).headers
+
+    streamed = client.get("/api/v1/stream", headers=headers)
+    assert "content-encoding" not in streamed.headers
+    assert len(streamed.text.splitlines()) == 500
+
+    encoded = client.get("/api/v1/encoded", headers=headers)
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.text == "x" * 5000
+
+
+def test_no_cache_headers():
+    client = make_client()
+    assert client.get("/api/v1/small").headers["cache-control"] == "no-cache, no-store, must-revalidate"
+    assert client.get("/api/v1/tagged").headers["cache-control"] == "no-cache"
+    assert "cache-control" not in client.get("/index.html").headers
+
+
+def test_accept_encoding_parsing():
+    assert _accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert _accepted_encodings("GZIP;q=0.5") == {"gzip"}
+    assert _accepted_encodings("") == set()
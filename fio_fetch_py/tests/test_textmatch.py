@@ -0,0 +1,21 @@
+from fiofetch.textmatch import AhoCorasick, find_symbols
+
+
+def naive_find(patterns, text):
+    return sorted(
+        (i, p) for p in set(patterns) if p for i in range(len(text)) if text.startswith(p, i)
+    )
+
+
+def test_automaton_finds_all_overlapping_occurrences():
+    patterns = ['he', 'she', 'his', 'hers', '123', '2345', '23']
+    text = 'ushers 12345 his 23 she'
+    assert sorted(AhoCorasick(patterns).find(text)) == naive_find(patterns, text)
+
+
+def test_find_symbols_requires_token_boundaries():
+    automaton = AhoCorasick(['25070101', '1230101'])
+    assert find_symbols(automaton, 'VS:25070101, SS 1230101') == {'25070101', '1230101'}
+    assert find_symbols(automaton, 'VS25070101/SS1230101') == {'25070101', '1230101'}
+    assert find_symbols(automaton, '9250701012 11230101') == set()
+    assert find_symbols(automaton, None) == set()